@@ -0,0 +1,50 @@
+"""store token ids instead of raw tokens in token_blacklist
+
+Revision ID: 3c9d0a7e51f2
+Revises: bf0eebc283ac
+Create Date: 2026-10-17 09:12:41.208331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9d0a7e51f2'
+down_revision: Union[str, Sequence[str], None] = 'bf0eebc283ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing rows are backfilled with the SHA-256 hex digest of the stored token, which is the
+    identifier the application falls back to for tokens minted without a `jti` claim.
+    """
+    op.add_column('token_blacklist', sa.Column('jti', sa.String(length=64), nullable=True))
+    op.execute(
+        "UPDATE token_blacklist "
+        "SET jti = encode(sha256(convert_to(token, 'UTF8')), 'hex') "
+        "WHERE jti IS NULL"
+    )
+    op.alter_column('token_blacklist', 'jti', nullable=False)
+    op.drop_index(op.f('ix_token_blacklist_token'), table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'token')
+    op.create_index(op.f('ix_token_blacklist_jti'), 'token_blacklist', ['jti'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Raw tokens cannot be recovered from their ids; the old column is refilled with the ids so the
+    unique constraint holds, which means restored rows no longer match any presented token.
+    """
+    op.add_column('token_blacklist', sa.Column('token', sa.String(), nullable=True))
+    op.execute("UPDATE token_blacklist SET token = jti")
+    op.alter_column('token_blacklist', 'token', nullable=False)
+    op.drop_index(op.f('ix_token_blacklist_jti'), table_name='token_blacklist')
+    op.drop_column('token_blacklist', 'jti')
+    op.create_index(op.f('ix_token_blacklist_token'), 'token_blacklist', ['token'], unique=True)
@@ -0,0 +1,41 @@
+"""add permissions.bit_index
+
+Revision ID: 5a2f7c8d9e14
+Revises: 8e41b6f0c2d7
+Create Date: 2026-10-17 11:26:53.940217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a2f7c8d9e14'
+down_revision: Union[str, Sequence[str], None] = '8e41b6f0c2d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing permissions get bit indexes in creation order.
+    """
+    op.add_column('permissions', sa.Column('bit_index', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE permissions SET bit_index = numbered.position "
+        "FROM ("
+        "  SELECT id, row_number() OVER (ORDER BY created_at, id) - 1 AS position"
+        "  FROM permissions"
+        ") AS numbered "
+        "WHERE permissions.id = numbered.id"
+    )
+    op.create_unique_constraint(op.f('uq_permissions_bit_index'), 'permissions', ['bit_index'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(op.f('uq_permissions_bit_index'), 'permissions', type_='unique')
+    op.drop_column('permissions', 'bit_index')
@@ -1,4 +1,4 @@
-from app.core.db import SessionDep
+from app.core.db import ReadSessionDep, SessionDep
 from app.core.dependencies.auth import check_permission, get_current_superuser
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
@@ -16,10 +16,12 @@ from app.schemas.auth import (
     UserResponse,
 )
 from app.services.auth import AuthService
+from app.services.permission_registry import PermissionRegistryService
+from app.services.permission_resolver import PermissionResolver
 from app.services.permissions import PermissionService
 from app.services.roles import RoleService
 from app.schemas.auth import TokenType
-from app.models.auth import User
+from app.core.utils.token_cache import CurrentUser
 
 router = APIRouter()
 
@@ -43,7 +45,7 @@ async def sign_up(
 async def create_user(
     user_data: UserCreateInternal,
     db: SessionDep,
-    current_user: User = Depends(
+    current_user: CurrentUser = Depends(
         get_current_superuser
     ),  # Only superusers can create users
 ):
@@ -65,7 +67,7 @@ async def sign_in(db: SessionDep, form_data: OAuth2PasswordRequestForm = Depends
         )
 
     # Get user permissions
-    permissions = await AuthService.get_user_permissions(db, str(user.id))
+    permission_claims = await PermissionResolver.permission_claims(db, str(user.id))
 
     # Create access token
     access_token = AuthService.create_access_token(
@@ -73,7 +75,7 @@ async def sign_in(db: SessionDep, form_data: OAuth2PasswordRequestForm = Depends
             "sub": str(user.id),
             "username": user.username,
             "is_superuser": user.is_superuser,
-            "permissions": permissions,
+            **permission_claims,
         }
     )
     print(user.email)
@@ -91,7 +93,7 @@ async def sign_in(db: SessionDep, form_data: OAuth2PasswordRequestForm = Depends
 async def create_role(
     role_data: RoleCreate,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Create a new role"""
     role = await RoleService.create_role(db, role_data)
@@ -101,8 +103,8 @@ async def create_role(
 @router.get("/roles/{role_id}", response_model=RoleWithPermissions)
 async def get_role(
     role_id: str,
-    db: SessionDep,
-    current_user: User = Depends(check_permission("role:read")),
+    db: ReadSessionDep,
+    current_user: CurrentUser = Depends(check_permission("role:read")),
 ):
     """Get role by ID"""
     role = await RoleService.get_role(db, role_id)
@@ -117,7 +119,7 @@ async def get_role(
 async def assign_role_to_user(
     request: AssignRoleRequest,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Assign role to user"""
     user_role = await RoleService.assign_role_to_user(db, request.user_id, request.role_id)
@@ -131,7 +133,7 @@ async def remove_role_from_user(
     user_id: str,
     role_id: str,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Remove role from user"""
     await RoleService.remove_role_from_user(db, user_id, role_id)
@@ -140,6 +142,20 @@ async def remove_role_from_user(
 # Permission Management Endpoints
 
 
+@router.get("/permissions/registry")
+async def get_permission_registry(
+    current_user: CurrentUser = Depends(get_current_superuser),
+):
+    """Permission bit indexes and role masks, for decoding `pmask` token claims"""
+    registry = await PermissionRegistryService.get()
+    if registry is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Permission registry not loaded yet",
+        )
+    return registry.to_dict()
+
+
 @router.post(
     "/permissions",
     response_model=PermissionResponse,
@@ -148,7 +164,7 @@ async def remove_role_from_user(
 async def create_permission(
     permission_data: PermissionCreate,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Create a new permission"""
     permission = await PermissionService.create_permission(db, permission_data)
@@ -159,7 +175,7 @@ async def create_permission(
 async def assign_permission_to_role(
     request: AssignPermissionRequest,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Assign permission to role"""
     role_perm = await PermissionService.assign_permission_to_role(
@@ -176,7 +192,7 @@ async def remove_permission_from_role(
     role_id: str,
     permission_id: str,
     db: SessionDep,
-    current_user: User = Depends(get_current_superuser),
+    current_user: CurrentUser = Depends(get_current_superuser),
 ):
     """Remove permission from role"""
     await PermissionService.remove_permission_from_role(db, role_id, permission_id)
@@ -3,10 +3,11 @@ from datetime import UTC, datetime
 from typing import Annotated
 
 from app.core.config import settings
-from app.core.db import async_get_db
+from app.core.db import async_engine, async_get_db
 from app.core.health import check_database_health, check_redis_health
 from app.core.schemas import HealthCheck, ReadyCheck
 from app.core.utils.cache import async_get_redis
+from app.core.utils.hashing import get_password_hasher
 from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
 from redis.asyncio import Redis
@@ -63,3 +64,15 @@ async def ready(
     }
 
     return JSONResponse(status_code=http_status, content=response)
+
+
+@router.get("/hashing")
+async def hashing_stats():
+    """Password hashing pool configuration and counters"""
+    return get_password_hasher().stats()
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Database connection pool occupancy, checkout waits and overflow counters"""
+    return async_engine.pool.stats()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.db import SessionDep
+from app.core.db import ReadSessionDep, SessionDep
 from app.schemas.auth import (
     UserResponse,
     UserWithRoles,
@@ -7,15 +7,15 @@ from app.schemas.auth import (
 )
 from app.services.auth import AuthService
 from app.core.dependencies.auth import get_current_user, check_permission
-from app.models.auth import User
+from app.core.utils.token_cache import CurrentUser
 
 router = APIRouter()
 
 
 @router.get("/me")
 async def get_current_user_info(
-    db: SessionDep,
-    current_user: User = Depends(get_current_user),
+    db: ReadSessionDep,
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Get current user information"""
     user = await AuthService.get_user(db, current_user.id)
@@ -26,7 +26,7 @@ async def get_current_user_info(
 async def update_current_user(
     db: SessionDep,
     user_data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Update current user"""
     user = await AuthService.update_user(db, str(current_user.id), user_data)
@@ -35,9 +35,9 @@ async def update_current_user(
 
 @router.get("/users/{user_id}", response_model=UserWithRoles)
 async def get_user(
-    db: SessionDep,
+    db: ReadSessionDep,
     user_id: str,
-    current_user: User = Depends(check_permission("user:read")),
+    current_user: CurrentUser = Depends(check_permission("user:read")),
 ):
     """Get user by ID"""
     user = await AuthService.get_user(db, user_id)
@@ -53,7 +53,7 @@ async def update_user(
     db: SessionDep,
     user_id: str,
     user_data: UserUpdate,
-    current_user: User = Depends(check_permission("user:write")),
+    current_user: CurrentUser = Depends(check_permission("user:write")),
 ):
     """Update user"""
     user = await AuthService.update_user(db, user_id, user_data)
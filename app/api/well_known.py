@@ -0,0 +1,20 @@
+from app.core.config import settings
+from app.core.utils import jwt_keys
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+router = APIRouter(prefix="/.well-known", tags=["Auth"])
+
+
+@router.get("/jwks.json")
+async def jwks():
+    """Public keys verifiers use to check access tokens, selected by the token's `kid`"""
+    return JSONResponse(
+        content=jwt_keys.keys.jwks(),
+        headers={
+            "Cache-Control": (
+                f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}, "
+                f"stale-while-revalidate={settings.JWKS_MAX_AGE_SECONDS}"
+            )
+        },
+    )
@@ -1,11 +1,16 @@
 from collections.abc import AsyncGenerator
-from typing import Annotated
+from contextvars import ContextVar
+from typing import Annotated, Any
 
 from fastapi import Depends
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass
+from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass, ORMExecuteState, Session
 from app.core.config import settings
+from app.core.utils import cache
+from app.core.utils.db_pool import InstrumentedAsyncPool
+from app.core.utils.ttl_cache import TTLCache
 
 
 class Base(DeclarativeBase, MappedAsDataclass):
@@ -16,14 +21,101 @@ DATABASE_URI = settings.POSTGRES_URI
 DATABASE_PREFIX = settings.POSTGRES_ASYNC_PREFIX
 DATABASE_URL = f"{DATABASE_PREFIX}{DATABASE_URI}"
 
+ENGINE_OPTIONS: dict[str, Any] = {
+    "echo": False,
+    "future": True,
+    "poolclass": InstrumentedAsyncPool,
+    "pool_size": settings.POSTGRES_POOL_SIZE,
+    "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+    "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+    "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+    "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+    "connect_args": {"statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE},
+}
+
+async_engine = create_async_engine(DATABASE_URL, **ENGINE_OPTIONS)
+
+replica_engine = (
+    create_async_engine(f"{DATABASE_PREFIX}{settings.POSTGRES_REPLICA_URI}", **ENGINE_OPTIONS)
+    if settings.POSTGRES_REPLICA_URI
+    else None
+)
+
+# Set by get_current_user so read sessions can keep a user who just wrote on the primary.
+current_user_id: ContextVar[str | None] = ContextVar("current_user_id", default=None)
+
+RECENT_WRITE_PREFIX = "db:recent-write:"
+_recent_writers: TTLCache[str, bool] = TTLCache(
+    maxsize=10_000, ttl=settings.POSTGRES_REPLICA_STICKY_SECONDS
+)
+
+
+class ReadSession(Session):
+    """Session for read-only requests: queries go to the replica when one is configured.
+
+    Users who wrote within `POSTGRES_REPLICA_STICKY_SECONDS` read from the primary, as does
+    anything flushed through this session by mistake.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if replica_engine is None or self._flushing or current_user_id.get() in _recent_writers:
+            return async_engine.sync_engine
+        return replica_engine.sync_engine
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+async def mark_recent_write(user_id: str) -> None:
+    _recent_writers.set(user_id, True)
+    if cache.client is not None:
+        await cache.client.set(
+            f"{RECENT_WRITE_PREFIX}{user_id}", 1, px=int(settings.POSTGRES_REPLICA_STICKY_SECONDS * 1000)
+        )
+
+
+async def load_recent_write(user_id: str) -> None:
+    """Pick up a write `user_id` made through another process, so this one reads from the primary."""
+    if replica_engine is None or cache.client is None or user_id in _recent_writers:
+        return
+    remaining_ms = await cache.client.pttl(f"{RECENT_WRITE_PREFIX}{user_id}")
+    if remaining_ms > 0:
+        _recent_writers.set(user_id, True, ttl=remaining_ms / 1000)
 
-async_engine = create_async_engine(DATABASE_URL, echo=False, future=True)
 
 local_session = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
 
+read_session = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=ReadSession, expire_on_commit=False
+)
+
 
 async def async_get_db() -> AsyncGenerator[AsyncSession, None]:
     async with local_session() as db:
         yield db
+        user_id = current_user_id.get()
+        if replica_engine is not None and user_id and db.info.get("wrote"):
+            await mark_recent_write(user_id)
+
+
+SessionDep = Annotated[AsyncSession, Depends(async_get_db)]
+
+
+async def async_get_read_db(db: SessionDep) -> AsyncGenerator[AsyncSession, None]:
+    # without a replica, share the request's primary session rather than hold a second connection
+    if replica_engine is None:
+        yield db
+        return
+    async with read_session() as read_db:
+        yield read_db
+
 
-SessionDep = Annotated[AsyncSession, Depends(async_get_db)]
\ No newline at end of file
+ReadSessionDep = Annotated[AsyncSession, Depends(async_get_read_db)]
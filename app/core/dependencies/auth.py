@@ -1,23 +1,34 @@
 from typing import Annotated
 
 from app.core.config import settings
-from app.core.db import SessionDep
+from app.core.db import ReadSessionDep, SessionDep, current_user_id, load_recent_write
 from app.core.logger import logging
+from app.core.utils import jwt_keys
+from app.core.utils.token_cache import CurrentUser, verified_tokens
 from app.models.auth import User
 from app.schemas.auth import TokenData
 from app.services.auth import AuthService, TokenType, oauth2_scheme
+from app.services.permission_registry import PermissionRegistryService
+from app.services.permission_resolver import PermissionResolver
+from shared.auth.permissions import compile_permissions
 from fastapi import Depends, HTTPException, Request, status
-from jose import JWTError, jwt
+from jwt import InvalidTokenError
 from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
 
 async def get_current_user(
-    db: SessionDep,
+    db: ReadSessionDep,
     token: Annotated[str, Depends(oauth2_scheme)],
-) -> User:
+) -> CurrentUser:
     """Validate JWT token and return current user"""
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        current_user_id.set(cached.user.id)
+        await load_recent_write(cached.user.id)
+        return cached.user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -25,9 +36,7 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY.get_secret_value(), algorithms=[settings.ALGORITHM]
-        )
+        payload = jwt_keys.decode(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
@@ -37,20 +46,47 @@ async def get_current_user(
             is_superuser=payload.get("is_superuser", False),
             permissions=payload.get("permissions", []),
         )
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
 
+    current_user_id.set(user_id)
+    await load_recent_write(user_id)
+
     result = await db.execute(select(User).where(User.id == token_data.user_id))
     user: User | None = result.scalar_one_or_none()
     if user is None or not user.is_active:
         raise credentials_exception
 
-    return user
+    permission_claims = await _resolve_permission_claims(payload)
+    return verified_tokens.set(
+        token, payload, CurrentUser.from_user(user, permission_claims)
+    ).user
+
+
+async def _resolve_permission_claims(payload: dict) -> dict:
+    """Turn `roles` / `permissions_ref` claims into the `pmask` / `permissions` forms.
+
+    A reference that can no longer be resolved, or roles while the registry is unknown, leave the
+    token without permission claims, so checks fall back to the resolver.
+    """
+    if "roles" in payload:
+        registry = await PermissionRegistryService.get()
+        if registry is None:
+            return payload
+        mask = registry.role_mask(payload["roles"])
+        return {**payload, "pmask": registry.encode_mask(mask)}
+
+    if "permissions_ref" in payload:
+        permissions = await PermissionResolver.resolve_permission_set(payload["permissions_ref"])
+        if permissions is not None:
+            return {**payload, "permissions": permissions}
+
+    return payload
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     """Ensure user is active"""
     if not current_user.is_active:
         raise HTTPException(
@@ -59,7 +95,9 @@ async def get_current_active_user(
     return current_user
 
 
-async def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_superuser(
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     """Ensure user is superuser"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -68,7 +106,7 @@ async def get_current_superuser(current_user: User = Depends(get_current_user))
     return current_user
 
 
-async def get_optional_user(request: Request, db: SessionDep) -> dict | None:
+async def get_optional_user(request: Request, db: SessionDep) -> CurrentUser | None:
     token = request.headers.get("Authorization")
     if not token:
         return None
@@ -82,7 +120,7 @@ async def get_optional_user(request: Request, db: SessionDep) -> dict | None:
         if token_data is None:
             return None
 
-        return await get_current_user(token_value, db=db)
+        return await get_current_user(db=db, token=token_value)
 
     except HTTPException as http_exc:
         if http_exc.status_code != 401:
@@ -108,8 +146,8 @@ async def anonymous_only(
         return
 
     try:
-        jwt.decode(token, settings.SECRET_KEY.get_secret_value(), algorithms=[settings.ALGORITHM])
-    except JWTError:
+        jwt_keys.decode(token)
+    except InvalidTokenError:
         # invalid token → treat as anonymous
         return
 
@@ -124,19 +162,29 @@ def check_permission(required_permission: str):
     """Decorator to check if user has specific permission"""
 
     async def permission_checker(
-        current_user: User = Depends(get_current_user), db=SessionDep
+        db: SessionDep, current_user: CurrentUser = Depends(get_current_user)
     ):
         if current_user.is_superuser:
             return current_user
 
-        # Get user's permissions through roles
-        user_permissions = []
-        for user_role in current_user.user_roles:
-            for role_perm in user_role.role.role_permissions:
-                perm = f"{role_perm.permission.resource}:{role_perm.permission.action}"
-                user_permissions.append(perm)
-
-        if required_permission not in user_permissions:
+        registry = None
+        if (
+            current_user.permission_mask is not None
+            and settings.PERMISSION_EVALUATION_MODE == "claims"
+        ):
+            registry = await PermissionRegistryService.get()
+
+        if registry is not None:
+            allowed = registry.allows(current_user.permission_mask, required_permission)
+        else:
+            grants = current_user.grants
+            if grants is None or settings.PERMISSION_EVALUATION_MODE == "resolver":
+                grants = compile_permissions(
+                    await PermissionResolver.get_user_permissions(db, current_user.id)
+                )
+            allowed = grants.allows(required_permission)
+
+        if not allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied. Required: {required_permission}",
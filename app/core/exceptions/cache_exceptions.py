@@ -14,3 +14,9 @@ class MissingClientError(Exception):
     def __init__(self, message: str = "Client is None.") -> None:
         self.message = message
         super().__init__(self.message)
+
+
+class UncacheableResponseError(Exception):
+    def __init__(self, message: str = "Streaming responses cannot be cached.") -> None:
+        self.message = message
+        super().__init__(self.message)
@@ -62,3 +62,10 @@ class RateLimitException(CustomException):
         super().__init__(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail
         )  # pragma: no cover
+
+
+class ServiceUnavailableException(CustomException):
+    def __init__(self, detail: Union[str, None] = None):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail
+        )  # pragma: no cover
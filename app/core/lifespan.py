@@ -1,6 +1,7 @@
 import asyncio
 from collections.abc import AsyncGenerator, Callable
 from contextlib import _AsyncGeneratorContextManager, asynccontextmanager
+from datetime import timedelta
 from typing import Any
 
 import anyio
@@ -11,17 +12,23 @@ from app.core.config import (
     CORSSettings,
     DatabaseSettings,
     EnvironmentSettings,
+    PasswordHashingSettings,
+    PermissionCacheSettings,
     RabbitMQSettings,
     RedisCacheSettings,
     RedisQueueSettings,
+    TokenRevocationSettings,
     settings,
 )
-from app.core.db import Base, SessionDep
+from app.core.db import Base, SessionDep, local_session
 from app.core.db import async_engine as engine
-from app.core.utils import cache, queue
+from app.core.utils import cache, hashing, queue, revocation
 from app.messaging.event_consumer import EmployeeEventConsumer
+from app.messaging import outbox, rabbitmq
 from app.messaging.rabbitmq import get_rabbitmq_client
 from app.models import *  # noqa: F403
+from app.services import permission_registry
+from app.services.permissions import PermissionService
 from arq import create_pool
 from arq.connections import RedisSettings
 from fastapi import FastAPI
@@ -39,6 +46,10 @@ async def create_redis_cache_pool() -> None:
     cache.client = redis.Redis.from_pool(cache.pool)  # type: ignore
 
 
+async def start_cache_invalidation_listener() -> asyncio.Task:
+    return asyncio.create_task(cache.listen_for_invalidations())
+
+
 async def close_redis_cache_pool() -> None:
     if cache.client is not None:
         await cache.client.aclose()  # type: ignore
@@ -56,17 +67,87 @@ async def close_redis_queue_pool() -> None:
         await queue.pool.aclose()  # type: ignore
 
 
+# -------------- token revocation --------------
+async def start_revocation_sync() -> list[asyncio.Task]:
+    """Load the revocation Bloom filter, then keep it fed from pub/sub and periodic reloads"""
+    return [
+        asyncio.create_task(revocation.store.listen()),
+        asyncio.create_task(
+            revocation.refresh_periodically(
+                local_session, settings.REVOCATION_SYNC_INTERVAL_SECONDS
+            )
+        ),
+    ]
+
+
+# -------------- permission registry --------------
+async def start_permission_registry_sync() -> asyncio.Task:
+    return asyncio.create_task(
+        permission_registry.refresh_periodically(
+            local_session, settings.PERMISSION_REGISTRY_REFRESH_SECONDS
+        )
+    )
+
+
+# -------------- password hashing --------------
+async def create_password_hasher() -> None:
+    hashing.get_password_hasher().start()
+
+
+async def close_password_hasher() -> None:
+    if hashing.hasher is not None:
+        hashing.hasher.shutdown()
+
+
 # -------------- application --------------
+async def stop_background_tasks(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def set_threadpool_tokens(number_of_tokens: int = 100) -> None:
     limiter = anyio.to_thread.current_default_thread_limiter()
     limiter.total_tokens = number_of_tokens
 
 
+# -------------- publisher --------------
+async def start_event_publisher() -> asyncio.Task:
+    client = await get_rabbitmq_client()
+    return asyncio.create_task(client.publisher.run())
+
+
+async def start_outbox_relay() -> asyncio.Task:
+    client = await get_rabbitmq_client()
+    return asyncio.create_task(
+        outbox.relay_periodically(
+            local_session,
+            client.publish_batch,
+            batch_size=settings.OUTBOX_BATCH_SIZE,
+            interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+            retention=timedelta(hours=settings.OUTBOX_RETENTION_HOURS),
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            apply=PermissionService.apply_outbox_events,
+        )
+    )
+
+
+async def close_rabbitmq_client() -> None:
+    if rabbitmq.rabbitmq_client is not None:
+        await rabbitmq.rabbitmq_client.close()
+
+
 # -------------- consumer --------------
-async def start_event_consumer():
+async def start_event_consumer() -> asyncio.Task:
     """Start event consumer on app startup"""
-    consumer = EmployeeEventConsumer(settings.RABBITMQ_URL)
-    asyncio.create_task(consumer.start())
+    consumer = EmployeeEventConsumer(
+        settings.RABBITMQ_URL,
+        prefetch=settings.EMPLOYEE_EVENTS_PREFETCH,
+        concurrency=settings.EMPLOYEE_EVENTS_CONCURRENCY,
+        batch_size=settings.EMPLOYEE_EVENTS_BATCH_SIZE,
+        batch_wait=settings.EMPLOYEE_EVENTS_BATCH_WAIT_MS / 1000,
+    )
+    return asyncio.create_task(consumer.run())
 
 
 def lifespan_factory(
@@ -79,6 +160,9 @@ def lifespan_factory(
         | RedisQueueSettings
         | EnvironmentSettings
         | RabbitMQSettings
+        | PasswordHashingSettings
+        | TokenRevocationSettings
+        | PermissionCacheSettings
     ),
     create_tables_on_start: bool = False,
 ) -> Callable[[FastAPI], _AsyncGeneratorContextManager[Any]]:
@@ -90,34 +174,54 @@ def lifespan_factory(
 
         initialization_complete = Event()
         app.state.initialization_complete = initialization_complete
+        background_tasks: list[asyncio.Task] = []
 
         await set_threadpool_tokens()
 
         try:
             if isinstance(settings, RedisCacheSettings):
                 await create_redis_cache_pool()
+                background_tasks.append(await start_cache_invalidation_listener())
+
+            if isinstance(settings, TokenRevocationSettings):
+                background_tasks += await start_revocation_sync()
+
+            if isinstance(settings, PermissionCacheSettings):
+                background_tasks.append(await start_permission_registry_sync())
 
             if isinstance(settings, RedisQueueSettings):
                 await create_redis_queue_pool()
 
+            if isinstance(settings, PasswordHashingSettings):
+                await create_password_hasher()
+
             if create_tables_on_start:
                 await create_tables()
 
             if isinstance(settings, RabbitMQSettings):
                 # Initialize RabbitMQ
-                await get_rabbitmq_client()
+                background_tasks.append(await start_event_publisher())
+                background_tasks.append(await start_outbox_relay())
                 # Initialize Consumer
-                await start_event_consumer()
+                background_tasks.append(await start_event_consumer())
 
             initialization_complete.set()
 
             yield
 
         finally:
+            await stop_background_tasks(background_tasks)
+
+            if isinstance(settings, RabbitMQSettings):
+                await close_rabbitmq_client()
+
             if isinstance(settings, RedisCacheSettings):
                 await close_redis_cache_pool()
 
             if isinstance(settings, RedisQueueSettings):
                 await close_redis_queue_pool()
 
+            if isinstance(settings, PasswordHashingSettings):
+                await close_password_hasher()
+
     return lifespan
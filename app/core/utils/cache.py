@@ -1,154 +1,191 @@
+import asyncio
+import fnmatch
 import functools
+import hashlib
+import inspect
 import json
+import logging
+import operator
 import re
+import time
 from collections.abc import AsyncGenerator, Callable
+from dataclasses import dataclass
 from typing import Annotated, Any
+from uuid import uuid4
 
+from app.core.config import settings
 from app.core.exceptions.cache_exceptions import (
     CacheIdentificationInferenceError,
     InvalidRequestError,
     MissingClientError,
+    UncacheableResponseError,
 )
-from fastapi import Depends, Request
+from app.core.utils.cache_codec import CacheCodec
+from app.core.utils.ttl_cache import TTLCache
+from fastapi import Depends, Request, Response
 from fastapi.encoders import jsonable_encoder
+import orjson
 from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+
+LOGGER = logging.getLogger(__name__)
 
 pool: ConnectionPool | None = None
 client: Redis | None = None
 
+# Unlink KEYS, then every key matching each ARGV pattern, in one server-side call.
+# Runs to completion on the server, so only use it where the patterns match few keys.
+INVALIDATE_SCRIPT = """
+local removed = 0
+if #KEYS > 0 then
+    removed = redis.call('UNLINK', unpack(KEYS))
+end
+for _, pattern in ipairs(ARGV) do
+    local cursor = '0'
+    repeat
+        local reply = redis.call('SCAN', cursor, 'MATCH', pattern, 'COUNT', 500)
+        cursor = reply[1]
+        if #reply[2] > 0 then
+            removed = removed + redis.call('UNLINK', unpack(reply[2]))
+        end
+    until cursor == '0'
+end
+return removed
+"""
+
+# Current generation of each tag in KEYS[2..], joined with '.', plus the value at KEYS[1].
+TAGGED_GET_SCRIPT = """
+local generations = {}
+for i = 2, #KEYS do
+    generations[#generations + 1] = redis.call('GET', KEYS[i]) or '0'
+end
+return {table.concat(generations, '.'), redis.call('GET', KEYS[1])}
+"""
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+TAG_PREFIX = "cache:tag:"
+LOCK_PREFIX = "cache:lock:"
+STALE_SUFFIX = ":stale"
+LOCK_POLL_SECONDS = 0.05
+
+@dataclass(frozen=True, slots=True)
+class _LocalEntry:
+    data: bytes
+    tags: frozenset[str]
+
+
+# Per-process tier for endpoints decorated with `local_ttl`, keyed like Redis.
+_local: TTLCache[str, _LocalEntry] = TTLCache(
+    maxsize=settings.CACHE_L1_MAX_SIZE, ttl=settings.CACHE_L1_MAX_TTL_SECONDS
+)
 
-def _infer_resource_id(
-    kwargs: dict[str, Any], resource_id_type: type | tuple[type, ...]
-) -> int | str:
-    """Infer the resource ID from a dictionary of keyword arguments.
-
-    Parameters
-    ----------
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-    resource_id_type: Union[type, Tuple[type, ...]]
-        The expected type of the resource ID, which can be integer (int) or a string (str).
-
-    Returns
-    -------
-    Union[None, int, str]
-        The inferred resource ID. If it cannot be inferred or does not match the expected type, it returns None.
+default_codec = CacheCodec(
+    serializer=settings.CACHE_SERIALIZER,
+    compression=settings.CACHE_COMPRESSION,
+    threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+)
 
-    Note
-    ----
-        - When `resource_id_type` is `int`, the function looks for an argument with the key 'id'.
-        - When `resource_id_type` is `str`, it attempts to infer the resource ID as a string.
-    """
-    resource_id: int | str | None = None
-    for arg_name, arg_value in kwargs.items():
-        if isinstance(arg_value, resource_id_type):
-            if (resource_id_type is int) and ("id" in arg_name):
-                resource_id = arg_value
+# Misses currently being computed in this process, by cache key.
+_inflight: dict[str, asyncio.Future] = {}
 
-            elif (resource_id_type is int) and ("id" not in arg_name):
-                pass
+# Other per-process caches evicting their entries on messages of the invalidation channel.
+invalidation_handlers: list[Callable[[dict[str, Any]], None]] = []
 
-            elif resource_id_type is str:
-                resource_id = arg_value
+_scripts: dict[str, Any] = {}
+_scripts_client: Redis | None = None
 
-    if resource_id is None:
-        raise CacheIdentificationInferenceError
 
-    return resource_id
+def _script(source: str) -> Any:
+    """Script object for `source` registered on the current client (EVALSHA with fallback)."""
+    global _scripts_client
 
+    if _scripts_client is not client:
+        _scripts.clear()
+        _scripts_client = client
+    if source not in _scripts:
+        _scripts[source] = client.register_script(source)  # type: ignore[union-attr]
+    return _scripts[source]
 
-def _extract_data_inside_brackets(input_string: str) -> list[str]:
-    """Extract data inside curly brackets from a given string using regular expressions.
 
-    Parameters
-    ----------
-    input_string: str
-        The input string in which to find data enclosed within curly brackets.
-
-    Returns
-    -------
-    List[str]
-        A list of strings containing the data found inside the curly brackets within the input string.
+def _template_fields(template: str) -> list[str]:
+    """Names of the fields in a key template.
 
     Example
     -------
-    >>> _extract_data_inside_brackets("The {quick} brown {fox} jumps over the {lazy} dog.")
-    ['quick', 'fox', 'lazy']
+    >>> _template_fields("user:{user_id}:items:{page}")
+    ['user_id', 'page']
     """
-    data_inside_brackets = re.findall(r"{(.*?)}", input_string)
-    return data_inside_brackets
+    return re.findall(r"{(.*?)}", template)
 
 
-def _construct_data_dict(
-    data_inside_brackets: list[str], kwargs: dict[str, Any]
-) -> dict[str, Any]:
-    """Construct a dictionary based on data inside brackets and keyword arguments.
+def _compile_template(template: str) -> Callable[[dict[str, Any]], str]:
+    """Compile a key template once into a callable formatting it from the endpoint's kwargs.
 
     Parameters
     ----------
-    data_inside_brackets: List[str]
-        A list of keys inside brackets.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    template: str
+        The template, e.g. "user:{user_id}". A missing field raises KeyError when formatting.
 
     Returns
     -------
-    Dict[str, Any]: A dictionary with keys from data_inside_brackets and corresponding values from kwargs.
+    Callable[[Dict[str, Any]], str]
+        `template.format_map`, or a constant function for templates without fields.
     """
-    data_dict = {}
-    for key in data_inside_brackets:
-        data_dict[key] = kwargs[key]
-    return data_dict
+    if not _template_fields(template):
+        return lambda kwargs: template
+    return template.format_map
 
 
-def _format_prefix(prefix: str, kwargs: dict[str, Any]) -> str:
-    """Format a prefix using keyword arguments.
+def _compile_resource_id(
+    func: Callable,
+    resource_id_name: Any,
+    resource_id_type: type | tuple[type, ...],
+) -> Callable[[dict[str, Any]], int | str]:
+    """Resolve, once, where the resource ID of `func` comes from.
 
     Parameters
     ----------
-    prefix: str
-        The prefix template to be formatted.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
+    func: Callable
+        The decorated endpoint.
+    resource_id_name: Any
+        Name of the argument holding the resource ID; if given it is read directly.
+    resource_id_type: Union[type, Tuple[type, ...]]
+        Otherwise, the ID is the last argument of this type, in signature order. For `int` only
+        arguments with 'id' in their name are considered.
 
     Returns
     -------
-    str: The formatted prefix.
+    Callable[[Dict[str, Any]], Union[int, str]]
+        A function returning the resource ID from the endpoint's kwargs; it raises
+        `CacheIdentificationInferenceError` when no argument matches.
     """
-    data_inside_brackets = _extract_data_inside_brackets(prefix)
-    data_dict = _construct_data_dict(data_inside_brackets, kwargs)
-    formatted_prefix = prefix.format(**data_dict)
-    return formatted_prefix
-
-
-def _format_extra_data(
-    to_invalidate_extra: dict[str, str], kwargs: dict[str, Any]
-) -> dict[str, Any]:
-    """Format extra data based on provided templates and keyword arguments.
+    if resource_id_name:
+        return operator.itemgetter(resource_id_name)
 
-    This function takes a dictionary of templates and their associated values and a dictionary of keyword arguments.
-    It formats the templates with the corresponding values from the keyword arguments and returns a dictionary
-    where keys are the formatted templates and values are the associated keyword argument values.
+    if resource_id_type is int:
+        candidates = [name for name in inspect.signature(func).parameters if "id" in name]
+    elif resource_id_type is str:
+        candidates = list(inspect.signature(func).parameters)
+    else:
+        candidates = []
 
-    Parameters
-    ----------
-    to_invalidate_extra: Dict[str, str]
-        A dictionary where keys are templates and values are the associated values.
-    kwargs: Dict[str, Any]
-        A dictionary of keyword arguments.
-
-    Returns
-    -------
-        Dict[str, Any]: A dictionary where keys are formatted templates and values
-        are associated keyword argument values.
-    """
-    formatted_extra = {}
-    for prefix, id_template in to_invalidate_extra.items():
-        formatted_prefix = _format_prefix(prefix, kwargs)
-        id = _extract_data_inside_brackets(id_template)[0]
-        formatted_extra[formatted_prefix] = kwargs[id]
+    def resolve(kwargs: dict[str, Any]) -> int | str:
+        resource_id = None
+        for name in candidates:
+            value = kwargs.get(name)
+            if isinstance(value, resource_id_type):
+                resource_id = value
+        if resource_id is None:
+            raise CacheIdentificationInferenceError
+        return resource_id
 
-    return formatted_extra
+    return resolve
 
 
 async def _delete_keys_by_pattern(pattern: str) -> None:
@@ -173,9 +210,7 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     - The SCAN command is used with a count of 100 to retrieve keys in batches.
       This count can be adjusted based on the size of your dataset and Redis performance.
 
-    - The function uses the delete command to remove keys in bulk. If the dataset
-      is extremely large, consider implementing additional logic to handle bulk deletion
-      more efficiently.
+    - Each batch is removed with a single UNLINK, which frees memory outside the Redis main thread.
 
     - Be cautious with patterns that could match a large number of keys, as deleting
       many keys simultaneously may impact the performance of the Redis server.
@@ -187,11 +222,170 @@ async def _delete_keys_by_pattern(pattern: str) -> None:
     while True:
         cursor, keys = await client.scan(cursor, match=pattern, count=100)
         if keys:
-            await client.delete(*keys)
+            await client.unlink(*keys)
         if cursor == 0:
             break
 
 
+def _consume_exception(future: asyncio.Future) -> None:
+    # the leader re-raises; waiters are optional, so don't warn when there are none
+    if not future.cancelled():
+        future.exception()
+
+
+def _pack_response(result: Any) -> bytes:
+    """Encode `result` as a cache entry: `<etag>\\n<media type>\\n<body>`."""
+    if isinstance(result, Response) and not hasattr(result, "body"):
+        # streaming and file responses have no body until they are sent
+        raise UncacheableResponseError
+    if isinstance(result, Response):
+        body, media_type = bytes(result.body), result.media_type or "application/json"
+    else:
+        body, media_type = orjson.dumps(result, default=jsonable_encoder), "application/json"
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    return f"{etag}\n{media_type}\n".encode() + body
+
+
+def _raw_response(request: Request, data: bytes) -> Response:
+    etag, media_type, body = data.split(b"\n", 2)
+    headers = {"ETag": etag.decode()}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or headers["ETag"] in if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type.decode(), headers=headers)
+
+
+def _store_local(cache_key: str, data: bytes, tags: list[str], ttl: float) -> None:
+    _local.set(cache_key, _LocalEntry(data, frozenset(tags)), ttl=ttl)
+
+
+async def _get_tagged(cache_key: str, tag_keys: list[str]) -> tuple[str, bytes | None]:
+    """Fetch `cache_key` with the current generation stamp of its tags, in one round trip.
+
+    Tagged entries are stored as `<stamp>\n<data>`; an entry written under an older stamp has been
+    invalidated and is returned as None.
+    """
+    reply = await _script(TAGGED_GET_SCRIPT)(keys=[cache_key, *tag_keys])
+    stamp = reply[0].decode() if isinstance(reply[0], bytes) else reply[0]
+    return stamp, _unstamp(reply[1] if len(reply) > 1 else None, stamp)
+
+
+def _unstamp(value: bytes | None, stamp: str | None) -> bytes | None:
+    """`value` without its generation stamp, or None if it was written under another generation."""
+    if value is None or stamp is None:
+        return value
+    entry_stamp, _, data = value.partition(b"\n")
+    return data if entry_stamp.decode() == stamp else None
+
+
+def _invalidate_local(keys: list[str], patterns: list[str], tags: list[str]) -> None:
+    for key in keys:
+        _local.pop(key)
+    if patterns or tags:
+        tag_set = set(tags)
+        _local.discard_where(
+            lambda key, entry: not tag_set.isdisjoint(entry.tags)
+            or any(fnmatch.fnmatchcase(key, pattern) for pattern in patterns)
+        )
+
+
+async def listen_for_invalidations(max_backoff: float = 30.0) -> None:
+    """Apply invalidations published by other processes to this process's local tier.
+
+    Invalidations published while the subscription is down are lost, so the local tier is cleared
+    whenever it drops and again once it is back, and the subscription is retried with backoff.
+    """
+    if client is None:
+        return
+
+    backoff = min(1.0, max_backoff)
+    while True:
+        try:
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+                # anything published before we subscribed is unknown
+                _local.clear()
+                backoff = min(1.0, max_backoff)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                        _invalidate_local(data.get("keys", []), data.get("patterns", []), data.get("tags", []))
+                        for handler in invalidation_handlers:
+                            handler(data)
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        LOGGER.error(f"Ignoring malformed cache invalidation {message['data']!r}: {e}")
+            finally:
+                await pubsub.aclose()
+        except RedisError as e:
+            LOGGER.warning(f"Cache invalidation listener disconnected, retrying in {backoff}s: {e}")
+
+        _local.clear()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
+
+
+async def publish_invalidation(message: dict[str, Any]) -> None:
+    """Announce `message` on the invalidation channel, for the `invalidation_handlers` of every process."""
+    if client is None:
+        return
+    try:
+        await client.publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps(message))
+    except RedisError as e:
+        LOGGER.warning(f"Could not publish cache invalidation: {e}")
+
+
+async def invalidate(
+    keys: list[str],
+    patterns: list[str] | None = None,
+    atomic: bool = False,
+    tags: list[str] | None = None,
+) -> int:
+    """Remove `keys`, every key matching `patterns`, and every entry tagged with one of `tags`.
+
+    Exact keys and tag bumps go in a single pipelined round trip. Invalidating a tag only increments
+    its generation counter, so it costs the same however many entries carry it. With `atomic`, the
+    patterns are scanned by a Lua script instead of batch by batch from here.
+
+    The invalidation is also published, in the same round trip, so every process drops its local
+    copies.
+
+    Returns the number of keys removed, not counting tagged entries (those simply stop matching and
+    expire on their own). Tag counters expire `CACHE_TAG_TTL_SECONDS` after their last bump, or
+    when the last entry written under them does if that is later.
+    """
+    _invalidate_local(keys, patterns or [], tags or [])
+    if client is None:
+        return 0
+
+    removed = 0
+    async with client.pipeline(transaction=False) as pipe:
+        if keys:
+            pipe.unlink(*keys)
+        for tag in tags or ():
+            tag_key = f"{TAG_PREFIX}{tag}"
+            pipe.incr(tag_key)
+            # a counter must outlive every entry stamped with it: were it to expire and count up
+            # again, entries written under an old generation would match once more
+            pipe.expire(tag_key, settings.CACHE_TAG_TTL_SECONDS, nx=True)
+            pipe.expire(tag_key, settings.CACHE_TAG_TTL_SECONDS, gt=True)
+        pipe.publish(
+            settings.CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"keys": keys, "patterns": patterns or [], "tags": tags or []}),
+        )
+        replies = await pipe.execute()
+    removed = replies[0] if keys else 0
+
+    if atomic and patterns:
+        removed += await _script(INVALIDATE_SCRIPT)(keys=[], args=patterns)
+    else:
+        for pattern in patterns or ():
+            await _delete_keys_by_pattern(pattern)
+    return removed
+
+
 def cache(
     key_prefix: str,
     resource_id_name: Any = None,
@@ -199,6 +393,13 @@ def cache(
     resource_id_type: type | tuple[type, ...] = int,
     to_invalidate_extra: dict[str, Any] | None = None,
     pattern_to_invalidate_extra: list[str] | None = None,
+    atomic_invalidation: bool = False,
+    tags: list[str] | None = None,
+    local_ttl: float | None = None,
+    lock_ttl: float | None = None,
+    stale_ttl: int | None = None,
+    raw_response: bool = False,
+    codec: CacheCodec | None = None,
 ) -> Callable:
     """Cache decorator for FastAPI endpoints.
 
@@ -224,6 +425,37 @@ def cache(
     pattern_to_invalidate_extra: List[str] | None, optional
         A list of string patterns for cache keys that should be invalidated when the decorated function is called.
         This allows for bulk invalidation of cache keys based on a matching pattern.
+    atomic_invalidation: bool, default False
+        Invalidate the keys and patterns with a single Lua script call instead of scanning each pattern
+        from the application. The script blocks Redis while it scans, so keep it to small keyspaces.
+    tags: List[str] | None, optional
+        Tag templates (formatted like `key_prefix`, e.g. "user:{user_id}"). GET responses are cached under
+        the current generation of each tag; any other method bumps the tags' generations, invalidating
+        every entry carrying them in O(1). Prefer this to `pattern_to_invalidate_extra`.
+    local_ttl: float | None, optional
+        Also keep GET responses in this process for up to `local_ttl` seconds (capped by
+        `CACHE_L1_MAX_TTL_SECONDS`). Local hits skip Redis and JSON decoding entirely. Such endpoints always
+        respond with the cached JSON body, bypassing `response_model`, so their return value must already
+        be the response shape. Invalidations reach other processes through Redis pub/sub; the TTL bounds
+        staleness if a message is missed.
+
+    lock_ttl: float | None, optional
+        On a miss, take a Redis lock with this lease (seconds) before calling the endpoint, so only one process
+        recomputes a hot key. Concurrent misses within a process always share one computation.
+    stale_ttl: int | None, optional
+        Keep a copy of each value for `stale_ttl` seconds past its expiration. While another process holds
+        the lock, misses are answered from that copy instead of waiting, unless its tags were invalidated.
+
+    raw_response: bool, default False
+        Cache the final response instead of the endpoint's data: the body is encoded once with orjson and
+        stored with its content type and ETag. Hits are returned as a raw `Response` (or a 304 when the
+        request's `If-None-Match` matches) without decoding, validation or re-encoding. As with `local_ttl`,
+        `response_model` is bypassed, so the endpoint must return the response shape. Streaming responses
+        cannot be cached and raise `UncacheableResponseError`.
+
+    codec: CacheCodec | None, optional
+        How values are encoded in Redis. Defaults to the codec configured by `CACHE_SERIALIZER`,
+        `CACHE_COMPRESSION` and `CACHE_COMPRESSION_THRESHOLD`; values written by any codec can be read back.
 
     Returns
     -------
@@ -292,59 +524,156 @@ def cache(
     - `to_invalidate_extra` and `pattern_to_invalidate_extra` are used for cache invalidation on methods other than GET.
     - Using `pattern_to_invalidate_extra` can be resource-intensive on large datasets. Use it judiciously and
       consider the potential impact on Redis performance.
+    - A cache miss costs one GET and one `SET ... EX`; an invalidation without patterns is a single round trip.
+    - Tagged lookups run a small Lua script over the entry and its tag counters, which must share a hash slot
+      on Redis Cluster.
     """
 
+    value_codec = codec or default_codec
+
+    # Key templates are compiled here, once, so building keys per request is plain formatting.
+    format_prefix = _compile_template(key_prefix)
+    format_tags = [_compile_template(tag) for tag in tags or ()]
+    format_patterns = [_compile_template(pattern) for pattern in pattern_to_invalidate_extra or ()]
+    format_extra = [
+        (_compile_template(prefix), _template_fields(id_template)[0])
+        for prefix, id_template in (to_invalidate_extra or {}).items()
+    ]
+
     def wrapper(func: Callable) -> Callable:
+        resolve_resource_id = _compile_resource_id(func, resource_id_name, resource_id_type)
+
         @functools.wraps(func)
         async def inner(request: Request, *args: Any, **kwargs: Any) -> Any:
             if client is None:
                 raise MissingClientError
 
-            if resource_id_name:
-                resource_id = kwargs[resource_id_name]
-            else:
-                resource_id = _infer_resource_id(
-                    kwargs=kwargs, resource_id_type=resource_id_type
-                )
-
-            formatted_key_prefix = _format_prefix(key_prefix, kwargs)
-            cache_key = f"{formatted_key_prefix}:{resource_id}"
-            if request.method == "GET":
-                if (
-                    to_invalidate_extra is not None
-                    or pattern_to_invalidate_extra is not None
-                ):
-                    raise InvalidRequestError
-
-                cached_data = await client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data.decode())
-
-            result = await func(request, *args, **kwargs)
-
-            if request.method == "GET":
-                serializable_data = jsonable_encoder(result)
-                serialized_data = json.dumps(serializable_data)
-
-                await client.set(cache_key, serialized_data)
-                await client.expire(cache_key, expiration)
-
-                return json.loads(serialized_data)
-
-            else:
-                await client.delete(cache_key)
-                if to_invalidate_extra is not None:
-                    formatted_extra = _format_extra_data(to_invalidate_extra, kwargs)
-                    for prefix, id in formatted_extra.items():
-                        extra_cache_key = f"{prefix}:{id}"
-                        await client.delete(extra_cache_key)
-
-                if pattern_to_invalidate_extra is not None:
-                    for pattern in pattern_to_invalidate_extra:
-                        formatted_pattern = _format_prefix(pattern, kwargs)
-                        await _delete_keys_by_pattern(formatted_pattern + "*")
-
-            return result
+            cache_key = f"{format_prefix(kwargs)}:{resolve_resource_id(kwargs)}"
+            entry_tags = [format_tag(kwargs) for format_tag in format_tags]
+
+            if request.method != "GET":
+                result = await func(request, *args, **kwargs)
+
+                keys = [cache_key, f"{cache_key}{STALE_SUFFIX}"]
+                for format_extra_prefix, id_name in format_extra:
+                    extra_key = f"{format_extra_prefix(kwargs)}:{kwargs[id_name]}"
+                    keys += [extra_key, f"{extra_key}{STALE_SUFFIX}"]
+
+                patterns = [format_pattern(kwargs) + "*" for format_pattern in format_patterns]
+                await invalidate(keys, patterns, atomic=atomic_invalidation, tags=entry_tags)
+                return result
+
+            if to_invalidate_extra is not None or pattern_to_invalidate_extra is not None:
+                raise InvalidRequestError
+
+            def respond(data: bytes, fresh: bool = True) -> Any:
+                if not (raw_response or local_ttl):
+                    return value_codec.loads(data)
+
+                body = value_codec.decode(data)
+                if local_ttl and fresh:
+                    _store_local(cache_key, body, entry_tags, local_ttl)
+                if raw_response:
+                    return _raw_response(request, body)
+                return Response(content=body, media_type="application/json")
+
+            if local_ttl:
+                entry = _local.get(cache_key)
+                if entry is not None:
+                    return respond(entry.data, fresh=False)
+
+            tag_keys = [f"{TAG_PREFIX}{tag}" for tag in entry_tags]
+
+            async def read() -> tuple[str | None, bytes | None]:
+                if tag_keys:
+                    return await _get_tagged(cache_key, tag_keys)
+                return None, await client.get(cache_key)  # type: ignore[union-attr]
+
+            stamp, cached_data = await read()
+            if cached_data:
+                return respond(cached_data)
+
+            # single flight: concurrent misses in this process share one computation
+            compute = lambda: func(request, *args, **kwargs)  # noqa: E731
+            flight = _inflight.get(cache_key)
+            if flight is not None:
+                try:
+                    data, fresh = await asyncio.shield(flight)
+                except asyncio.CancelledError:
+                    if not flight.cancelled():
+                        raise
+                    # the request computing it went away
+                    data, fresh = await _fill(cache_key, tag_keys, stamp, read, compute)
+                return respond(data, fresh)
+
+            flight = asyncio.get_running_loop().create_future()
+            flight.add_done_callback(_consume_exception)
+            _inflight[cache_key] = flight
+            try:
+                data, fresh = await _fill(cache_key, tag_keys, stamp, read, compute)
+                flight.set_result((data, fresh))
+            except asyncio.CancelledError:
+                flight.cancel()
+                raise
+            except Exception as e:
+                flight.set_exception(e)
+                raise
+            finally:
+                _inflight.pop(cache_key, None)
+
+            return respond(data, fresh)
+
+        async def _fill(
+            cache_key: str,
+            tag_keys: list[str],
+            stamp: str | None,
+            read: Callable[[], Any],
+            compute: Callable[[], Any],
+        ) -> tuple[bytes, bool]:
+            """Compute and store the value; returns it with whether it is fresh (not the stale copy)."""
+            lock_key = f"{LOCK_PREFIX}{cache_key}"
+            token = None
+            if lock_ttl:
+                token = uuid4().hex
+                if not await client.set(lock_key, token, nx=True, px=int(lock_ttl * 1000)):  # type: ignore[union-attr]
+                    token = None
+                    if stale_ttl:
+                        # the copy carries its tags' generation, so it is not served past an invalidation
+                        stale = _unstamp(await client.get(f"{cache_key}{STALE_SUFFIX}"), stamp)  # type: ignore[union-attr]
+                        if stale:
+                            return stale, False
+
+                    # another process is computing it: wait for its result, up to one lease
+                    deadline = time.monotonic() + lock_ttl
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(LOCK_POLL_SECONDS)
+                        stamp, data = await read()
+                        if data:
+                            return data, True
+
+            try:
+                result = await compute()
+                if raw_response:
+                    data = value_codec.encode(_pack_response(result))
+                else:
+                    data = value_codec.dumps(jsonable_encoder(result))
+                stored = data if stamp is None else stamp.encode() + b"\n" + data
+
+                async with client.pipeline(transaction=False) as pipe:  # type: ignore[union-attr]
+                    pipe.set(cache_key, stored, ex=expiration)
+                    if stale_ttl:
+                        pipe.set(f"{cache_key}{STALE_SUFFIX}", stored, ex=expiration + stale_ttl)
+                    for tag_key in tag_keys:
+                        # keep bumped counters alive for as long as this entry
+                        pipe.expire(tag_key, expiration + (stale_ttl or 0), gt=True)
+                    if token is not None:
+                        await _script(RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token], client=pipe)
+                        token = None
+                    await pipe.execute()
+                return data, True
+            finally:
+                if token is not None:
+                    await _script(RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[token])
 
         return inner
 
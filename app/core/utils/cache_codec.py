@@ -0,0 +1,126 @@
+import zlib
+from typing import Any, Literal
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional
+    lz4_frame = None
+
+Serializer = Literal["json", "msgpack"]
+Compression = Literal["none", "zlib", "zstd", "lz4"]
+
+# Encoded values start with a header byte in 0x10-0x17: 0x10 | serializer << 2 | compression.
+# Plain JSON (and packed raw responses) always start at 0x20 or above, so values written before
+# codecs existed, or by a process with the default codec, need no header and stay readable.
+HEADER_BASE = 0x10
+_SERIALIZERS: tuple[Serializer, ...] = ("json", "msgpack")
+_COMPRESSIONS: tuple[Compression, ...] = ("none", "zlib", "zstd", "lz4")
+
+
+def _require(module: Any, name: str) -> Any:
+    if module is None:
+        raise RuntimeError(f"Cache codec {name!r} is not installed")
+    return module
+
+
+def _compress(compression: Compression, payload: bytes) -> bytes:
+    if compression == "zlib":
+        return zlib.compress(payload)
+    if compression == "zstd":
+        return _require(zstandard, "zstd").ZstdCompressor().compress(payload)
+    return _require(lz4_frame, "lz4").compress(payload)
+
+
+def _decompress(compression: Compression, payload: bytes) -> bytes:
+    if compression == "zlib":
+        return zlib.decompress(payload)
+    if compression == "zstd":
+        return _require(zstandard, "zstd").ZstdDecompressor().decompress(payload)
+    return _require(lz4_frame, "lz4").decompress(payload)
+
+
+class CacheCodec:
+    """Encoding of cache values in Redis.
+
+    Values are serialized as JSON or msgpack and compressed once they reach `threshold` bytes. The
+    header byte records how each value was written, so any process can read values written with any
+    codec: roll out a new codec by deploying it everywhere before any process is configured to
+    write it.
+
+    Parameters
+    ----------
+    serializer: "json" | "msgpack"
+        Format of data values. Pre-encoded values (raw responses) are stored as they are.
+    compression: "none" | "zlib" | "zstd" | "lz4"
+        zstd and lz4 need the `zstandard` / `lz4` packages.
+    threshold: int
+        Smallest serialized size, in bytes, that gets compressed.
+    """
+
+    def __init__(
+        self,
+        serializer: Serializer = "json",
+        compression: Compression = "none",
+        threshold: int = 1024,
+    ) -> None:
+        if serializer == "msgpack":
+            _require(msgpack, "msgpack")
+        if compression != "none":
+            _compress(compression, b"")
+        self.serializer = serializer
+        self.compression = compression
+        self.threshold = threshold
+
+    def _frame(self, serializer: Serializer, payload: bytes) -> bytes:
+        compression: Compression = "none"
+        if self.compression != "none" and len(payload) >= self.threshold:
+            compression = self.compression
+            payload = _compress(compression, payload)
+
+        if serializer == "json" and compression == "none":
+            return payload
+        header = HEADER_BASE | _SERIALIZERS.index(serializer) << 2 | _COMPRESSIONS.index(compression)
+        return bytes((header,)) + payload
+
+    def _unframe(self, data: bytes) -> tuple[Serializer, bytes]:
+        if not data or data[0] >= 0x20:
+            return "json", data
+        header = data[0] - HEADER_BASE
+        compression = _COMPRESSIONS[header & 0b11]
+        payload = data[1:] if compression == "none" else _decompress(compression, data[1:])
+        return _SERIALIZERS[header >> 2], payload
+
+    def dumps(self, value: Any) -> bytes:
+        """Serialize JSON-compatible `value` (e.g. the output of `jsonable_encoder`)."""
+        if self.serializer == "msgpack":
+            return self._frame("msgpack", msgpack.packb(value))
+        return self._frame("json", orjson.dumps(value))
+
+    def encode(self, payload: bytes) -> bytes:
+        """Store already-encoded bytes, compressing them if large enough."""
+        return self._frame("json", payload)
+
+    def loads(self, data: bytes) -> Any:
+        serializer, payload = self._unframe(data)
+        if serializer == "msgpack":
+            return msgpack.unpackb(payload)
+        return orjson.loads(payload)
+
+    def decode(self, data: bytes) -> bytes:
+        """The stored value as JSON (or pre-encoded) bytes, whatever codec wrote it."""
+        serializer, payload = self._unframe(data)
+        if serializer == "msgpack":
+            return orjson.dumps(msgpack.unpackb(payload))
+        return payload
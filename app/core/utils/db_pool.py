@@ -0,0 +1,82 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets; the last bucket is open.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    timeouts: int = 0
+    overflow_opened: int = 0
+    peak_checked_out: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    wait_histogram: list[int] = field(default_factory=lambda: [0] * (len(WAIT_BUCKETS) + 1))
+
+    def observe_wait(self, seconds: float) -> None:
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        self.wait_histogram[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and when it has to overflow."""
+
+    def __init__(self, *args: Any, metrics: PoolMetrics | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            self.metrics.observe_wait(time.perf_counter() - start)
+            raise
+
+        self.metrics.checkouts += 1
+        self.metrics.observe_wait(time.perf_counter() - start)
+        self.metrics.peak_checked_out = max(self.metrics.peak_checked_out, self.checkedout())
+        return record
+
+    def _inc_overflow(self) -> bool:
+        opened = super()._inc_overflow()
+        if opened and self._overflow > 0:
+            self.metrics.overflow_opened += 1
+        return opened
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        # keep counting across engine.dispose()
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def stats(self) -> dict[str, Any]:
+        metrics = self.metrics
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "peak_checked_out": metrics.peak_checked_out,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "overflow_opened": metrics.overflow_opened,
+            "wait_seconds": {
+                "total": round(metrics.total_wait_seconds, 6),
+                "max": round(metrics.max_wait_seconds, 6),
+                "buckets": {
+                    **{f"le_{bound}": count for bound, count in zip(WAIT_BUCKETS, metrics.wait_histogram)},
+                    "le_inf": metrics.wait_histogram[-1],
+                },
+            },
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Literal, TypeVar
+
+import bcrypt
+
+from app.core.config import settings
+from app.core.exceptions.http_exceptions import ServiceUnavailableException
+
+T = TypeVar("T")
+
+
+# Module level so they can be pickled into a process pool.
+def _hashpw(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt())
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+@dataclass
+class HashingMetrics:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    total_seconds: float = 0.0
+
+
+class PasswordHasher:
+    """Run bcrypt on a bounded worker pool so hashing never blocks the event loop.
+
+    Parameters
+    ----------
+    kind: Literal["thread", "process"]
+        Pool flavour. bcrypt releases the GIL, so threads are usually enough; processes isolate
+        the CPU cost completely at the price of pickling and extra memory.
+    max_workers: int
+        Number of workers in the pool.
+    max_pending: int
+        Maximum number of hashes queued or running at once. Further calls fail fast with a 503
+        instead of piling up behind a login storm.
+    """
+
+    def __init__(
+        self,
+        kind: Literal["thread", "process"] = "thread",
+        max_workers: int = 4,
+        max_pending: int = 64,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.metrics = HashingMetrics()
+        self._executor: Executor | None = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn: Callable[..., T], *args: Any) -> T:
+        metrics = self.metrics
+        if metrics.in_flight >= self.max_pending:
+            metrics.rejected += 1
+            raise ServiceUnavailableException("Password hashing is saturated, try again shortly.")
+
+        if self._executor is None:
+            self.start()
+
+        metrics.submitted += 1
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            metrics.completed += 1
+            return result
+        except Exception:
+            metrics.failed += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.total_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._submit(_hashpw, password.encode())
+        return hashed.decode()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_checkpw, plain_password.encode(), hashed_password.encode())
+
+    def stats(self) -> dict[str, Any]:
+        completed = self.metrics.completed
+        return {
+            "executor": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            **asdict(self.metrics),
+            "avg_seconds": self.metrics.total_seconds / completed if completed else 0.0,
+        }
+
+
+hasher: PasswordHasher | None = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide hasher, creating it from settings on first use."""
+    global hasher
+    if hasher is None:
+        hasher = PasswordHasher(
+            kind=settings.PASSWORD_HASH_EXECUTOR,
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        )
+    return hasher
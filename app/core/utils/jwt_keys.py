@@ -0,0 +1,31 @@
+from typing import Any
+
+from app.core.config import settings
+from shared.auth.keys import KeySet
+from shared.auth.verifier import TokenVerifier
+
+
+def load_key_set() -> KeySet:
+    if settings.JWT_PRIVATE_KEY is None:
+        return KeySet.from_secret(settings.SECRET_KEY.get_secret_value(), settings.ALGORITHM)
+    return KeySet.from_pem(
+        settings.JWT_PRIVATE_KEY.get_secret_value(),
+        algorithm=None if settings.ALGORITHM.startswith("HS") else settings.ALGORITHM,
+        kid=settings.JWT_KEY_ID,
+        previous_public_pems=settings.JWT_PREVIOUS_PUBLIC_KEYS,
+        previous_kids=settings.JWT_PREVIOUS_KEY_IDS,
+    )
+
+
+# Keys this service signs tokens with and accepts them under.
+keys = load_key_set()
+verifier = TokenVerifier(keys)
+
+
+def encode(claims: dict[str, Any]) -> str:
+    return keys.sign(claims)
+
+
+def decode(token: str) -> dict[str, Any]:
+    """Verify `token` and return its claims with verbose names; raises `jwt.InvalidTokenError`."""
+    return verifier.decode(token)
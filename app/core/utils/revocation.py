@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from app.core.config import settings
+from app.core.utils import cache
+from app.models.token_blacklist import TokenBlacklist
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LOGGER = logging.getLogger(__name__)
+
+KEY_PREFIX = "revoked:"
+CHANNEL = "revoked-tokens"
+
+
+def token_fingerprint(token: str, claims: dict[str, Any] | None = None) -> str:
+    """Stable identifier under which a revoked token is stored.
+
+    This is the token's `jti` claim, or the SHA-256 hex digest of the raw token for tokens
+    minted before `jti` was introduced. Both fit the fixed-width `token_blacklist.jti` column.
+    """
+    jti = claims.get("jti") if claims else None
+    return jti or hashlib.sha256(token.encode()).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter answering "definitely absent" without any I/O.
+
+    Parameters
+    ----------
+    capacity: int
+        Expected number of items. Going past it raises the false-positive rate.
+    error_rate: float
+        Target false-positive probability at `capacity` items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """Revoked-token lookups backed by Redis with an in-memory Bloom filter in front.
+
+    Every revocation is written to Redis as `revoked:<fingerprint>` with a TTL equal to the
+    token's remaining lifetime and announced on a pub/sub channel so every process can add it to
+    its local filter. Until the filter has been loaded from the SQL table it is not trusted.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.ready = False
+        # revocations seen while a reload is reading the table, replayed into the new filter
+        self._added_during_load: list[str] | None = None
+        # set while the pub/sub listener is down: the filter may miss revocations until a reload
+        self._disconnected = False
+
+    def add(self, fingerprint: str) -> None:
+        self.bloom.add(fingerprint)
+        if self._added_during_load is not None:
+            self._added_during_load.append(fingerprint)
+
+    async def revoke(self, fingerprint: str, expires_at: float) -> None:
+        """Record a revocation. `expires_at` is the token's `exp` as a unix timestamp."""
+        self.add(fingerprint)
+
+        ttl = int(expires_at - time.time())
+        if cache.client is None or ttl <= 0:
+            return
+
+        try:
+            async with cache.client.pipeline(transaction=False) as pipe:
+                pipe.set(f"{KEY_PREFIX}{fingerprint}", 1, ex=ttl)
+                pipe.publish(CHANNEL, fingerprint)
+                await pipe.execute()
+        except RedisError as e:
+            # the blacklist row is the record; other processes pick it up on their next reload
+            LOGGER.warning(f"Could not announce revocation: {e}")
+
+    async def is_revoked(self, fingerprint: str) -> bool | None:
+        """Return whether the token is revoked, or None when only the database can tell."""
+        if self.ready and fingerprint not in self.bloom:
+            return False
+
+        if cache.client is None:
+            return None
+
+        try:
+            if await cache.client.exists(f"{KEY_PREFIX}{fingerprint}"):
+                return True
+        except RedisError as e:
+            LOGGER.warning(f"Revocation lookup fell back to the database: {e}")
+            return None
+
+        # a filter hit Redis does not confirm is either a false positive or a revocation whose
+        # Redis write failed; only the blacklist table can tell them apart
+        return None if fingerprint in self.bloom else False
+
+    async def load(self, db: AsyncSession) -> int:
+        """Rebuild the Bloom filter from the live rows of the blacklist table."""
+        self._added_during_load = []
+        try:
+            fingerprints = [fingerprint async for fingerprint, _ in _live_revocations(db)]
+            fingerprints.extend(self._added_during_load)
+        finally:
+            self._added_during_load = None
+
+        bloom = BloomFilter(max(self.capacity, 2 * len(fingerprints)), self.error_rate)
+        for fingerprint in fingerprints:
+            bloom.add(fingerprint)
+
+        self.bloom = bloom
+        self.ready = not self._disconnected
+        return len(fingerprints)
+
+    async def listen(self, max_backoff: float = 30.0) -> None:
+        """Add revocations announced by other processes to the local filter.
+
+        While the subscription is down the filter is not trusted; after resubscribing it is trusted
+        again once the next reload has picked up the revocations missed meanwhile.
+        """
+        if cache.client is None:
+            return
+
+        backoff = min(1.0, max_backoff)
+        while True:
+            try:
+                pubsub = cache.client.pubsub()
+                try:
+                    await pubsub.subscribe(CHANNEL)
+                    self._disconnected = False
+                    backoff = min(1.0, max_backoff)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.add(message["data"].decode())
+                finally:
+                    await pubsub.aclose()
+            except RedisError as e:
+                LOGGER.warning(f"Revocation listener disconnected, retrying in {backoff}s: {e}")
+
+            self._disconnected = True
+            self.ready = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+
+async def _live_revocations(db: AsyncSession):
+    now = time.time()
+    result = await db.stream(select(TokenBlacklist.jti, TokenBlacklist.expires_at))
+    async for jti, expires_at in result:
+        exp = expires_at.timestamp()
+        if exp > now:
+            yield jti, exp
+
+
+async def sync_redis_from_db(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Copy live rows of the blacklist table into Redis, e.g. after a Redis flush."""
+    if cache.client is None:
+        return 0
+
+    synced = 0
+    now = time.time()
+    pipe = cache.client.pipeline(transaction=False)
+    async for fingerprint, exp in _live_revocations(db):
+        pipe.set(f"{KEY_PREFIX}{fingerprint}", 1, ex=max(1, int(exp - now)), nx=True)
+        synced += 1
+        if synced % batch_size == 0:
+            await pipe.execute()
+    await pipe.execute()
+    return synced
+
+
+async def refresh_periodically(session_factory, interval: float) -> None:
+    """Reload the Bloom filter from SQL every `interval` seconds."""
+    while True:
+        try:
+            async with session_factory() as db:
+                loaded = await store.load(db)
+            LOGGER.debug(f"Loaded {loaded} revoked tokens into the Bloom filter")
+        except Exception as e:
+            LOGGER.exception(f"Revocation filter refresh failed with error: {e}")
+        await asyncio.sleep(interval)
+
+
+store = RevocationStore(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
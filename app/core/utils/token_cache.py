@@ -0,0 +1,111 @@
+import hashlib
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import settings
+from app.core.utils import cache
+from app.core.utils.ttl_cache import TTLCache
+from app.models.auth import User
+from shared.auth.permissions import PermissionRegistry, PermissionSet, compile_permissions
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Compact, session-independent view of the authenticated user.
+
+    Returned by `get_current_user` so a cache hit never needs the database.
+    """
+
+    id: str
+    username: str
+    email: str
+    is_active: bool
+    is_superuser: bool
+    # compiled `permissions` claim, None when the token carries no such claim
+    grants: PermissionSet | None = None
+    # decoded `pmask` claim, a bitmask over the permission registry
+    permission_mask: int | None = None
+
+    @classmethod
+    def from_user(cls, user: User, claims: dict[str, Any]) -> "CurrentUser":
+        permissions = claims.get("permissions")
+        mask = claims.get("pmask")
+        return cls(
+            id=str(user.id),
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            grants=compile_permissions(permissions) if permissions is not None else None,
+            permission_mask=PermissionRegistry.decode_mask(mask) if mask else None,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class VerifiedToken:
+    claims: dict[str, Any]
+    user: CurrentUser
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """Verified JWT claims plus a user snapshot, keyed by token digest.
+
+    Entries expire at the token's `exp` or after the configured TTL, whichever is sooner, and are
+    dropped explicitly when the user changes or the token is revoked. `evict` drops them in every
+    process, through the cache invalidation channel.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries: TTLCache[bytes, VerifiedToken] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, token: str) -> VerifiedToken | None:
+        return self._entries.get(token_digest(token))
+
+    def set(self, token: str, claims: dict[str, Any], user: CurrentUser) -> VerifiedToken:
+        entry = VerifiedToken(claims=claims, user=user)
+        exp = claims.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        self._entries.set(token_digest(token), entry, ttl=ttl)
+        return entry
+
+    def invalidate_token(self, token: str) -> None:
+        self._entries.pop(token_digest(token))
+
+    def invalidate_user(self, user_id: str) -> int:
+        return self.invalidate_users((user_id,))
+
+    def invalidate_users(self, user_ids: Iterable[str]) -> int:
+        ids = {str(user_id) for user_id in user_ids}
+        return self._entries.discard_where(lambda _, entry: entry.user.id in ids)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def apply_invalidation(self, message: dict[str, Any]) -> None:
+        """Drop the users and token digests named in an invalidation message."""
+        if message.get("users"):
+            self.invalidate_users(message["users"])
+        for digest in message.get("tokens", ()):
+            self._entries.pop(bytes.fromhex(digest))
+
+    async def evict(self, user_ids: Iterable[str] = (), tokens: Iterable[str] = ()) -> None:
+        """Drop the entries of `user_ids` and `tokens` here, and announce it to every process."""
+        message = {
+            "users": [str(user_id) for user_id in user_ids],
+            "tokens": [token_digest(token).hex() for token in tokens],
+        }
+        self.apply_invalidation(message)
+        await cache.publish_invalidation(message)
+
+
+verified_tokens = VerifiedTokenCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+# evictions announced by other processes arrive through the cache invalidation listener
+cache.invalidation_handlers.append(verified_tokens.apply_invalidation)
@@ -1,9 +1,15 @@
 import asyncio
 import logging
 
+import redis.asyncio as redis
 import uvloop
 from arq.worker import Worker
 
+from app.core.config import settings
+from app.core.db import local_session
+from app.core.utils import cache, revocation
+from app.services.auth import AuthService
+
 asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -15,10 +21,38 @@ async def sample_background_task(ctx: Worker, name: str) -> str:
     return f"Task {name} is complete!"
 
 
+async def sync_token_revocations(ctx: Worker) -> int:
+    """Re-publish live token_blacklist rows to the Redis revocation store."""
+    async with local_session() as db:
+        synced = await revocation.sync_redis_from_db(db)
+    logging.info(f"Synced {synced} revoked tokens to Redis")
+    return synced
+
+
+async def purge_expired_token_blacklist(ctx: Worker) -> int:
+    """Delete expired token_blacklist rows in bounded batches, pausing between them."""
+    batch_size = settings.BLACKLIST_PURGE_BATCH_SIZE
+    removed = 0
+    while True:
+        async with local_session() as db:
+            deleted = await AuthService.purge_expired_blacklist(db, batch_size)
+        removed += deleted
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(settings.BLACKLIST_PURGE_PAUSE_SECONDS)
+
+    logging.info(f"Purged {removed} expired token_blacklist rows")
+    return removed
+
+
 # -------- base functions --------
 async def startup(ctx: Worker) -> None:
+    cache.pool = redis.ConnectionPool.from_url(settings.REDIS_CACHE_URL)
+    cache.client = redis.Redis.from_pool(cache.pool)  # type: ignore
     logging.info("Worker Started")
 
 
 async def shutdown(ctx: Worker) -> None:
+    if cache.client is not None:
+        await cache.client.aclose()  # type: ignore
     logging.info("Worker end")
@@ -1,11 +1,26 @@
+from arq import cron
 from arq.connections import RedisSettings
 
 from app.core.config import settings
-from app.core.worker.functions import sample_background_task, shutdown, startup
+from app.core.worker.functions import (
+    purge_expired_token_blacklist,
+    sample_background_task,
+    shutdown,
+    startup,
+    sync_token_revocations,
+)
 
 
 class WorkerSettings:
-    functions = [sample_background_task]
+    functions = [
+        sample_background_task,
+        sync_token_revocations,
+        purge_expired_token_blacklist,
+    ]
+    cron_jobs = [
+        cron(sync_token_revocations, minute=set(range(0, 60, 5)), run_at_startup=True),
+        cron(purge_expired_token_blacklist, minute={17}),
+    ]
     redis_settings = RedisSettings(
         host=settings.REDIS_QUEUE_HOST, port=settings.REDIS_QUEUE_PORT
     )
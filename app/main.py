@@ -4,7 +4,7 @@
 
 # app = create_application(router=api_router, settings=settings)
 
-from app.api import api_router
+from app.api import api_router, well_known
 from app.core.config import settings
 from app.core.db import SessionDep
 from app.core.health import check_database_health, check_redis_health
@@ -47,6 +47,7 @@ async def get_base_endpoint(db: SessionDep, redis: cache.RedisDep):
 
 # Include routers
 app.include_router(api_router)
+app.include_router(well_known.router)
 
 # from fastapi import Request
 # from fastapi.exceptions import ResponseValidationError
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import aio_pika
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PooledChannel:
+    connection: Any
+    channel: Any
+    exchange: Any
+
+
+class ChannelPool:
+    """Publisher-confirm channels shared by concurrent publishers.
+
+    `size` channels are spread round-robin over `connections` robust connections, and each is
+    checked out by one publisher at a time, so concurrent publishes no longer queue on a single
+    channel. A channel found closed on checkout is reopened on its connection, waiting for the
+    connection to come back when the broker is being reconnected to.
+
+    Parameters
+    ----------
+    url: str
+        AMQP URL of the broker.
+    size: int
+        Number of channels.
+    connections: int
+        Number of connections the channels are sharded over.
+    declare: Callable
+        Declares what publishers need on a new channel and returns the exchange to publish to.
+    acquire_timeout: float
+        Seconds to wait for a free channel, or for a lost connection to come back.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        declare: Callable[[Any], Awaitable[Any]],
+        size: int = 8,
+        connections: int = 1,
+        acquire_timeout: float = 5.0,
+    ) -> None:
+        self.url = url
+        self.declare = declare
+        self.size = size
+        self.connections_count = min(connections, size)
+        self.acquire_timeout = acquire_timeout
+        self.connections: list[Any] = []
+        self._idle: asyncio.Queue[PooledChannel] = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        # bumped by close(), so channels checked out before it are dropped on return
+        self._generation = 0
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.connections)
+
+    async def connect(self) -> None:
+        async with self._lock:
+            if self.connections:
+                return
+            connections = [await aio_pika.connect_robust(self.url) for _ in range(self.connections_count)]
+            for i in range(self.size):
+                self._idle.put_nowait(await self._open(connections[i % len(connections)]))
+            self.connections = connections
+
+    async def close(self) -> None:
+        connections, self.connections = self.connections, []
+        self._generation += 1
+        self._idle = asyncio.Queue()
+        for connection in connections:
+            await connection.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledChannel]:
+        """Check out a healthy channel for the duration of the block."""
+        if not self.connections:
+            await self.connect()
+
+        generation, idle = self._generation, self._idle
+        pooled = await asyncio.wait_for(idle.get(), timeout=self.acquire_timeout)
+        try:
+            if pooled.channel.is_closed:
+                pooled = await self._reopen(pooled)
+            yield pooled
+        finally:
+            # a channel the broker closed during use is reopened on its next checkout; one from
+            # before close() belongs to a closed connection and is dropped
+            if generation == self._generation:
+                idle.put_nowait(pooled)
+
+    async def _open(self, connection: Any) -> PooledChannel:
+        channel = await connection.channel(publisher_confirms=True)
+        return PooledChannel(connection, channel, await self.declare(channel))
+
+    async def _reopen(self, pooled: PooledChannel) -> PooledChannel:
+        LOGGER.warning("Reopening closed RabbitMQ channel")
+        connection = pooled.connection
+        if connection.is_closed:
+            # robust connections reconnect by themselves; wait for that rather than fail at once
+            await asyncio.wait_for(connection.connected.wait(), timeout=self.acquire_timeout)
+        return await self._open(connection)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": self.size, "connections": len(self.connections), "idle": self._idle.qsize()}
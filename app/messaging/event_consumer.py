@@ -1,22 +1,53 @@
 # auth_service/app/messaging/event_consumer.py
+import asyncio
 import json
+import logging
+import time
+import zlib
 
 import aio_pika
-from app.core.db import AsyncSession
+from app.core.db import local_session
+from app.core.utils.token_cache import verified_tokens
 from app.models.auth import User
-from sqlalchemy import select
+from sqlalchemy import case, update
 
+LOGGER = logging.getLogger(__name__)
+
+DEAD_LETTER_QUEUE = "auth_service_employee_events.dead"
 
 class EmployeeEventConsumer:
-    def __init__(self, rabbitmq_url: str):
+    """Consumes employee events in micro-batches applied with bulk UPDATEs.
+
+    Up to `prefetch` unacknowledged messages are in flight. They are sharded by `user_id` over
+    `concurrency` workers, so one user's events are applied in order, and each worker collects up
+    to `batch_size` events or waits `batch_wait` seconds, then applies the batch in one
+    transaction and acks its messages after the commit.
+    """
+
+    def __init__(
+        self,
+        rabbitmq_url: str,
+        prefetch: int = 200,
+        concurrency: int = 4,
+        batch_size: int = 100,
+        batch_wait: float = 0.05,
+        session_factory=local_session,
+    ):
         self.rabbitmq_url = rabbitmq_url
+        self.prefetch = prefetch
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.session_factory = session_factory
         self.connection = None
         self.channel = None
+        self._queues: list[asyncio.Queue] = [asyncio.Queue() for _ in range(concurrency)]
 
     async def start(self):
         """Start consuming employee events"""
         self.connection = await aio_pika.connect_robust(self.rabbitmq_url)
         self.channel = await self.connection.channel()
+        await self.channel.set_qos(prefetch_count=self.prefetch)
 
         exchange = await self.channel.declare_exchange(
             "employee_events", aio_pika.ExchangeType.TOPIC, durable=True
@@ -25,52 +56,125 @@ class EmployeeEventConsumer:
         queue = await self.channel.declare_queue(
             "auth_service_employee_events", durable=True
         )
+        # events that keep failing are parked here for inspection and replay
+        await self.channel.declare_queue(DEAD_LETTER_QUEUE, durable=True)
 
         await queue.bind(exchange, routing_key="employee.*")
 
-        await queue.consume(self.process_message)
-        print("✅ Auth Service: Listening for employee events")
-
-    async def process_message(self, message: aio_pika.IncomingMessage):
-        """Process incoming employee event"""
-        async with message.process():
-            try:
-                event_data = json.loads(message.body.decode())
-                event_type = event_data.get("event_type")
-
-                if event_type == "employee.terminated":
-                    await self.handle_employee_terminated(event_data)
-                elif event_type == "employee.updated":
-                    await self.handle_employee_updated(event_data)
-            except Exception as e:
-                print(f"❌ Error processing employee event: {e}")
-
-    async def handle_employee_terminated(self, event_data: dict):
-        """Handle employee termination - deactivate user account"""
-        user_id = event_data["user_id"]
-
-        async with AsyncSession() as db:
-            stmt = select(User).where(User.id == user_id)
-            result = await db.execute(stmt)
-            user = result.scalar_one_or_none()
-
-            if user:
-                user.is_active = False
-                await db.commit()
-                print(f"✅ Deactivated user account for user_id: {user_id}")
-
-    async def handle_employee_updated(self, event_data: dict):
-        """Handle employee updates - sync email changes"""
-        user_id = event_data["user_id"]
-        updated_fields = event_data.get("updated_fields", {})
-
-        if "email" in updated_fields:
-            async with AsyncSession() as db:
-                stmt = select(User).where(User.id == user_id)
-                result = await db.execute(stmt)
-                user = result.scalar_one_or_none()
-
-                if user:
-                    user.email = event_data["email"]
-                    await db.commit()
-                    print(f"✅ Updated email for user {user.id}")
+        await queue.consume(self.enqueue)
+        LOGGER.info("Listening for employee events")
+
+    async def run(self):
+        """Consume until cancelled"""
+        try:
+            await self.start()
+            await asyncio.gather(*(self.work(queue) for queue in self._queues))
+        finally:
+            if self.connection:
+                await self.connection.close()
+
+    async def enqueue(self, message: aio_pika.abc.AbstractIncomingMessage):
+        """Hand a message to the worker owning its user"""
+        try:
+            event_data = json.loads(message.body.decode())
+            user_id = str(event_data["user_id"])
+        except Exception as e:
+            LOGGER.error("Dropping malformed employee event: %s", e)
+            await message.ack()
+            return
+        shard = zlib.crc32(user_id.encode()) % self.concurrency
+        self._queues[shard].put_nowait((message, event_data))
+
+    async def work(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self.process_batch(batch)
+
+    async def process_batch(self, batch: list[tuple[aio_pika.abc.AbstractIncomingMessage, dict]]):
+        """Apply a batch of events, then ack it.
+
+        If the batch fails as a whole, its events are applied one at a time so a single bad event
+        cannot hold back the others; only the events that fail on their own are rejected.
+        """
+        try:
+            affected = await self.apply([event_data for _, event_data in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                await self.reject(batch[0][0], e)
+                return
+            LOGGER.warning("Batch of %d employee events failed, applying them one by one: %s", len(batch), e)
+            for item in batch:
+                await self.process_batch([item])
+            return
+
+        if affected:
+            await verified_tokens.evict(user_ids=affected)
+        for message, _ in batch:
+            await message.ack()
+
+    async def reject(self, message: aio_pika.abc.AbstractIncomingMessage, error: Exception):
+        """Requeue a failed event once, then move it to the dead-letter queue"""
+        if not message.redelivered:
+            LOGGER.warning("Requeueing employee event after error: %s", error)
+            await message.nack(requeue=True)
+            return
+
+        LOGGER.error("Dead-lettering employee event after error: %s", error)
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                content_type=message.content_type,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                headers={"x-error": str(error)},
+            ),
+            routing_key=DEAD_LETTER_QUEUE,
+        )
+        await message.ack()
+
+    async def apply(self, events: list[dict]) -> set[str]:
+        """Write `events` in one transaction. Returns the ids of the users they touched."""
+        terminated: set[str] = set()
+        emails: dict[str, str] = {}
+        for event_data in events:
+            event_type = event_data.get("event_type")
+            user_id = str(event_data["user_id"])
+            if event_type == "employee.terminated":
+                # deactivate user account
+                terminated.add(user_id)
+            elif event_type == "employee.updated" and "email" in event_data.get("updated_fields", {}):
+                # sync email changes; the last one of the batch wins
+                email = event_data.get("email") or event_data["updated_fields"]["email"]
+                if isinstance(email, str):
+                    emails[user_id] = email
+
+        if not terminated and not emails:
+            return set()
+
+        async with self.session_factory() as db:
+            if terminated:
+                await db.execute(
+                    update(User)
+                    .where(User.id.in_(sorted(terminated)))
+                    .values(is_active=False)
+                    .execution_options(synchronize_session=False)
+                )
+            if emails:
+                await db.execute(
+                    update(User)
+                    .where(User.id.in_(list(emails)))
+                    .values(email=case(emails, value=User.id))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+        LOGGER.info("Applied %d deactivations and %d email updates", len(terminated), len(emails))
+        return terminated | emails.keys()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import orjson
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.messaging.publisher import OutgoingEvent
+from app.models.outbox import OutboxEvent
+
+LOGGER = logging.getLogger(__name__)
+
+
+class OutboxService:
+
+    @staticmethod
+    def add(db: AsyncSession, event_type: str, **fields: Any) -> OutboxEvent:
+        """Stage an `event_type` event in `db`; it is written, and later sent, only if `db` commits."""
+        event = OutboxEvent(routing_key=event_type, payload={})
+        event.payload = {
+            "event_id": event.event_id,
+            "event_type": event_type,
+            "timestamp": event.created_at.isoformat(),
+            **fields,
+        }
+        db.add(event)
+        return event
+
+
+async def relay_batch(
+    db: AsyncSession,
+    send,
+    batch_size: int,
+    max_attempts: int = 10,
+    apply=None,
+) -> int:
+    """Send up to `batch_size` unsent events and mark those the broker confirmed. Returns how many.
+
+    Rows are locked with `FOR UPDATE SKIP LOCKED`, so relays in several processes share the table
+    without sending an event twice (barring a crash between the confirm and the commit). Rows that
+    failed `max_attempts` sends are parked: left unsent and skipped until `attempts` is reset.
+
+    `apply(db, payloads)`, if given, then runs this service's own side effects of the events (cache
+    invalidation and the like) after the commit. It runs again for events whose send is retried,
+    so it must be idempotent; its failures are logged and do not hold back the relay.
+    """
+    result = await db.execute(
+        select(OutboxEvent)
+        .where(OutboxEvent.sent_at.is_(None), OutboxEvent.attempts < max_attempts)
+        .order_by(OutboxEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    events = result.scalars().all()
+    if not events:
+        return 0
+    payloads = [event.payload for event in events]
+
+    try:
+        results = await send([OutgoingEvent(event.routing_key, orjson.dumps(event.payload)) for event in events])
+    except Exception as exc:
+        results = [exc] * len(events)
+
+    sent = [event.id for event, error in zip(events, results) if error is None]
+    failed = [event for event, error in zip(events, results) if error is not None]
+    if sent:
+        await db.execute(
+            update(OutboxEvent).where(OutboxEvent.id.in_(sent)).values(sent_at=datetime.now(UTC))
+        )
+    if failed:
+        LOGGER.warning("Broker failed %d of %d outbox events", len(failed), len(events))
+        parked = [event.event_id for event in failed if event.attempts + 1 >= max_attempts]
+        if parked:
+            LOGGER.error("Parked outbox events after %d failed sends: %s", max_attempts, parked)
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_([event.id for event in failed]))
+            .values(attempts=OutboxEvent.attempts + 1)
+        )
+    await db.commit()
+
+    if apply is not None:
+        try:
+            await apply(db, payloads)
+        except Exception as e:
+            LOGGER.exception("Applying outbox events locally failed with error: %s", e)
+    return len(sent)
+
+
+async def relay_periodically(
+    session_factory,
+    send,
+    batch_size: int,
+    interval: float,
+    retention: timedelta,
+    max_attempts: int = 10,
+    apply=None,
+) -> None:
+    """Drain the outbox, then poll it every `interval` seconds. Sent rows are kept for `retention`."""
+    while True:
+        try:
+            async with session_factory() as db:
+                while await relay_batch(db, send, batch_size, max_attempts, apply) == batch_size:
+                    pass
+                await db.execute(
+                    delete(OutboxEvent).where(OutboxEvent.sent_at < datetime.now(UTC) - retention)
+                )
+                await db.commit()
+        except Exception as e:
+            LOGGER.exception("Outbox relay failed with error: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+
+from app.core.utils import cache
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class OutgoingEvent:
+    routing_key: str
+    body: bytes
+    attempts: int = 0
+
+
+# Sends a batch, returning per event None when the broker confirmed it or the exception otherwise.
+SendBatch = Callable[[list[OutgoingEvent]], Awaitable[list[BaseException | None]]]
+
+
+class BufferedPublisher:
+    """Publishes events in the background so callers never wait on the broker.
+
+    `publish` only appends to a bounded in-memory buffer; `run` sends it in batches and waits for
+    the broker's confirms. Events the broker rejects are retried with exponential backoff, and once
+    they run out of attempts, or the buffer is full, they are spilled to a Redis list. Spilled events
+    are read back whenever the buffer is idle, so they are delivered once the broker recovers.
+
+    Events are delivered at least once; consumers should deduplicate on `event_id`.
+
+    Parameters
+    ----------
+    send: SendBatch
+        Sends one batch with publisher confirms.
+    max_buffer: int
+        Events kept in memory before new ones are spilled.
+    batch_size: int
+        Events sent, and confirms awaited, together.
+    max_attempts: int
+        Sends of an event before it is spilled.
+    retry_backoff: float
+        Seconds to wait after a failed send; doubled for each further send failing in a row, up to
+        30s.
+    spill_key: str
+        Redis list holding spilled events.
+    idle_interval: float
+        Seconds between checks for spilled events while nothing is published.
+    """
+
+    def __init__(
+        self,
+        send: SendBatch,
+        max_buffer: int = 10_000,
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        retry_backoff: float = 0.5,
+        spill_key: str = "messaging:spilled-events",
+        idle_interval: float = 1.0,
+    ) -> None:
+        self.send = send
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.spill_key = spill_key
+        self.idle_interval = idle_interval
+        self.stats = {"published": 0, "retried": 0, "spilled": 0, "restored": 0, "dropped": 0}
+        self._buffer: deque[OutgoingEvent] = deque()
+        self._wakeup = asyncio.Event()
+        # failed sends in a row, which set the backoff (restored events start at 0 attempts)
+        self._failures = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def publish(self, routing_key: str, event: dict[str, Any]) -> None:
+        """Queue `event`; only awaits (a Redis write) when the buffer is full."""
+        outgoing = OutgoingEvent(routing_key, orjson.dumps(event))
+        if len(self._buffer) >= self.max_buffer:
+            await self._spill([outgoing])
+            return
+        self._buffer.append(outgoing)
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        """Send buffered events until cancelled."""
+        while True:
+            if not self._buffer:
+                await self._restore()
+            if not self._buffer:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_interval)
+                except asyncio.TimeoutError:
+                    continue
+
+            backoff = await self.flush()
+            if backoff:
+                await asyncio.sleep(backoff)
+
+    async def flush(self) -> float:
+        """Send everything buffered. Returns how long to back off if the broker failed a send."""
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                results = await self.send(batch)
+            except asyncio.CancelledError:
+                # shutting down: leave the batch for close() to send or spill
+                self._buffer.extendleft(reversed(batch))
+                raise
+            except Exception as exc:
+                results = [exc] * len(batch)
+
+            failed = [event for event, error in zip(batch, results) if error is not None]
+            self.stats["published"] += len(batch) - len(failed)
+            if not failed:
+                self._failures = 0
+                continue
+
+            LOGGER.warning("Broker failed %d of %d events: %s", len(failed), len(batch), results[0])
+            for event in failed:
+                event.attempts += 1
+            retry = [event for event in failed if event.attempts < self.max_attempts]
+            await self._spill([event for event in failed if event.attempts >= self.max_attempts])
+
+            self.stats["retried"] += len(retry)
+            # back in front, in their original order
+            self._buffer.extendleft(reversed(retry))
+            self._failures += 1
+            return min(self.retry_backoff * 2 ** (self._failures - 1), 30.0)
+        return 0.0
+
+    async def close(self) -> None:
+        """Try one last send, then spill whatever is left."""
+        if self._buffer:
+            for event in self._buffer:
+                event.attempts = self.max_attempts - 1
+            await self.flush()
+        await self._spill(list(self._buffer))
+        self._buffer.clear()
+
+    async def _spill(self, events: list[OutgoingEvent]) -> None:
+        if not events:
+            return
+        payloads = [orjson.dumps({"routing_key": e.routing_key, "body": e.body.decode()}) for e in events]
+        try:
+            if cache.client is None:
+                raise RuntimeError("no Redis client")
+            await cache.client.rpush(self.spill_key, *payloads)
+        except Exception as exc:
+            self.stats["dropped"] += len(events)
+            LOGGER.error("Dropped %d events that could not be spilled: %s", len(events), exc)
+            return
+        self.stats["spilled"] += len(events)
+
+    async def _restore(self) -> None:
+        if cache.client is None:
+            return
+        try:
+            payloads = await cache.client.lpop(self.spill_key, self.batch_size)
+        except Exception as exc:
+            LOGGER.warning("Could not read spilled events: %s", exc)
+            return
+        for payload in payloads or ():
+            spilled = orjson.loads(payload)
+            self._buffer.append(OutgoingEvent(spilled["routing_key"], spilled["body"].encode()))
+        self.stats["restored"] += len(payloads or ())
@@ -1,5 +1,5 @@
 # auth_service/app/messaging/rabbitmq.py
-import json
+import asyncio
 from datetime import datetime
 from typing import Annotated, Any, Dict
 from uuid import uuid4
@@ -7,41 +7,82 @@ from uuid import uuid4
 import aio_pika
 from fastapi import Depends
 
+from app.messaging.channel_pool import ChannelPool
+from app.messaging.publisher import BufferedPublisher, OutgoingEvent
+
+
+EXCHANGE = "auth_events"
+
+
+def _message(body: bytes) -> aio_pika.Message:
+    return aio_pika.Message(
+        body=body,
+        content_type="application/json",
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+async def _declare_exchange(channel: aio_pika.abc.AbstractChannel) -> aio_pika.abc.AbstractExchange:
+    return await channel.declare_exchange(EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True)
+
 
 class RabbitMQClient:
-    def __init__(self, rabbitmq_url: str):
+    def __init__(
+        self,
+        rabbitmq_url: str,
+        pool_size: int = 8,
+        connections: int = 1,
+        acquire_timeout: float = 5.0,
+        **publisher_options: Any,
+    ):
         self.rabbitmq_url = rabbitmq_url
-        self.connection = None
-        self.channel = None
-        self.exchange = None
+        self.channels = ChannelPool(
+            rabbitmq_url,
+            _declare_exchange,
+            size=pool_size,
+            connections=connections,
+            acquire_timeout=acquire_timeout,
+        )
+        self.publisher = BufferedPublisher(self.publish_batch, **publisher_options)
 
     async def connect(self):
-        self.connection = await aio_pika.connect_robust(self.rabbitmq_url)
-        self.channel = await self.connection.channel()
-
-        self.exchange = await self.channel.declare_exchange(
-            "auth_events",
-            aio_pika.ExchangeType.TOPIC,
-            durable=True,
-        )
+        await self.channels.connect()
 
     async def close(self):
-        """Close connection"""
-        if self.connection:
-            await self.connection.close()
+        """Hand off buffered events, then close the connections"""
+        await self.publisher.close()
+        await self.channels.close()
 
     async def publish_event(self, routing_key: str, event_data: Dict[str, Any]):
-        """Publish an event to the exchange"""
-        if not self.channel:
-            await self.connect()
-
-        message = aio_pika.Message(
-            body=json.dumps(event_data).encode(),
-            content_type="application/json",
-            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        """Queue an event for the exchange; it is sent by the background publisher"""
+        await self.publisher.publish(routing_key, event_data)
+
+    async def publish_batch(self, events: list[OutgoingEvent]) -> list[BaseException | None]:
+        """Publish `events` and wait for all their confirms.
+
+        Large batches are split over several pooled channels, so events of one batch may reach the
+        exchange out of order.
+        """
+        chunk = max(1, -(-len(events) // self.channels.size))
+        results = await asyncio.gather(
+            *(self._publish_chunk(events[i : i + chunk]) for i in range(0, len(events), chunk))
         )
-
-        await self.exchange.publish(message, routing_key=routing_key)
+        return [error for chunk_results in results for error in chunk_results]
+
+    async def _publish_chunk(self, events: list[OutgoingEvent]) -> list[BaseException | None]:
+        try:
+            async with self.channels.acquire() as pooled:
+                results = await asyncio.gather(
+                    *(
+                        pooled.exchange.publish(_message(event.body), routing_key=event.routing_key)
+                        for event in events
+                    ),
+                    return_exceptions=True,
+                )
+        except Exception as exc:
+            return [exc] * len(events)
+        # a confirmed publish returns the Basic.Ack frame; a nack raises
+        return [result if isinstance(result, BaseException) else None for result in results]
 
 
 # Global RabbitMQ client instance
@@ -54,7 +95,17 @@ async def get_rabbitmq_client() -> RabbitMQClient:
     if rabbitmq_client is None:
         from app.core.config import settings
 
-        rabbitmq_client = RabbitMQClient(settings.RABBITMQ_URL)
+        rabbitmq_client = RabbitMQClient(
+            settings.RABBITMQ_URL,
+            pool_size=settings.RABBITMQ_CHANNEL_POOL_SIZE,
+            connections=settings.RABBITMQ_CONNECTIONS,
+            acquire_timeout=settings.RABBITMQ_CHANNEL_ACQUIRE_TIMEOUT_SECONDS,
+            max_buffer=settings.RABBITMQ_PUBLISH_BUFFER_SIZE,
+            batch_size=settings.RABBITMQ_PUBLISH_BATCH_SIZE,
+            max_attempts=settings.RABBITMQ_PUBLISH_MAX_ATTEMPTS,
+            retry_backoff=settings.RABBITMQ_PUBLISH_RETRY_BACKOFF_SECONDS,
+            spill_key=settings.RABBITMQ_PUBLISH_SPILL_KEY,
+        )
         await rabbitmq_client.connect()
     return rabbitmq_client
 
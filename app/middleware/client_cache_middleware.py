@@ -1,56 +1,168 @@
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+import hashlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class ClientCacheMiddleware(BaseHTTPMiddleware):
-    """Middleware to set the `Cache-Control` header for client-side caching on all responses.
+CACHEABLE_METHODS = frozenset({"GET", "HEAD"})
 
-    Parameters
-    ----------
-    app: FastAPI
-        The FastAPI application instance.
-    max_age: int, optional
-        Duration (in seconds) for which the response should be cached. Defaults to 60 seconds.
+# Headers a 304 may carry over from the response it stands in for (RFC 9110, 15.4.5).
+_NOT_MODIFIED_HEADERS = (b"cache-control", b"content-location", b"date", b"etag", b"expires", b"vary")
+
+
+@dataclass(frozen=True, slots=True)
+class CachePolicy:
+    """How clients may cache a route's responses.
 
-    Attributes
+    Parameters
     ----------
     max_age: int
-        Duration (in seconds) for which the response should be cached.
+        Seconds a response stays fresh.
+    private: bool
+        Only the client itself may cache the response, not shared caches. Authenticated requests are
+        always treated as private.
+    no_store: bool
+        The response must not be cached at all.
+    etag: bool
+        Compute an ETag for responses without one and answer `If-None-Match` with 304.
+    stale_while_revalidate: int
+        Seconds a stale response may still be served while it is revalidated.
+    """
+
+    max_age: int = 60
+    private: bool = False
+    no_store: bool = False
+    etag: bool = True
+    stale_while_revalidate: int = 0
+
+    def header(self, authenticated: bool) -> str:
+        if self.no_store:
+            return "no-store"
+        directives = ["private" if self.private or authenticated else "public", f"max-age={self.max_age}"]
+        if self.stale_while_revalidate:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(directives)
 
-    Methods
+
+NO_STORE = CachePolicy(no_store=True, etag=False)
+
+
+def cache_policy(policy: CachePolicy) -> Callable[[Callable], Callable]:
+    """Set the client cache policy of an endpoint.
+
+    Example
     -------
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        Process the request and set the `Cache-Control` header in the response.
+    >>> @router.get("/tiers")
+    ... @cache_policy(CachePolicy(max_age=300))
+    ... async def read_tiers(request: Request): ...
+    """
+
+    def wrapper(func: Callable) -> Callable:
+        func.__cache_policy__ = policy
+        return func
+
+    return wrapper
+
+
+def _etag(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
 
-    Note
-    ----
-        - The `Cache-Control` header instructs clients (e.g., browsers)
-        to cache the response for the specified duration.
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as If-None-Match requires
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class ClientCacheMiddleware:
+    """Pure ASGI middleware setting `Cache-Control`, and `ETag` for cacheable responses.
+
+    Only successful GET and HEAD responses get a caching policy: the endpoint's own (see
+    `cache_policy`), or `public, max-age=<max_age>` by default, `private` when the request carries
+    credentials. Everything else is marked `no-store`. Responses that already set `Cache-Control`
+    are left alone.
+
+    When a cacheable GET response is sent in a single body message, a strong ETag is computed from it
+    (unless the endpoint set one) and a matching `If-None-Match` gets an empty 304 instead. Streamed
+    responses are passed through as they are: nothing is buffered beyond the first body message.
+
+    Parameters
+    ----------
+    app: ASGIApp
+        The application to wrap.
+    max_age: int, optional
+        Duration (in seconds) for which responses without a policy are cached. Defaults to 60 seconds.
     """
 
-    def __init__(self, app: FastAPI, max_age: int = 60) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, max_age: int = 60) -> None:
+        self.app = app
         self.max_age = max_age
+        self.default_policy = CachePolicy(max_age=max_age)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        authenticated = "authorization" in request_headers or "cookie" in request_headers
+        cacheable_method = scope["method"] in CACHEABLE_METHODS
+        start: Message | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    await send(message)
+                    return
+                policy = self._policy(scope) if cacheable_method and message["status"] == 200 else NO_STORE
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = policy.header(authenticated)
+                if not policy.etag or policy.no_store or scope["method"] != "GET":
+                    await send(message)
+                else:
+                    # hold the start until the body shows whether the response is sent in one piece
+                    start = message
+                return
+
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            if message.get("more_body", False):
+                await send(held)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=held)
+            etag = headers.get("etag")
+            if etag is None:
+                etag = _etag(message.get("body", b"")).decode()
+                headers["ETag"] = etag
+
+            if_none_match = request_headers.get("if-none-match")
+            if if_none_match and _etag_matches(if_none_match, etag):
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [(k, v) for k, v in held["headers"] if k in _NOT_MODIFIED_HEADERS],
+                    }
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(held)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        """Process the request and set the `Cache-Control` header in the response.
-
-        Parameters
-        ----------
-        request: Request
-            The incoming request.
-        call_next: RequestResponseEndpoint
-            The next middleware or route handler in the processing chain.
-
-        Returns
-        -------
-        Response
-            The response object with the `Cache-Control` header set.
-
-        Note
-        ----
-            - This method is automatically called by Starlette for processing the request-response cycle.
-        """
-        response: Response = await call_next(request)
-        response.headers["Cache-Control"] = f"public, max-age={self.max_age}"
-        return response
+    def _policy(self, scope: Scope) -> CachePolicy:
+        # the router fills in the matched endpoint on the shared scope before the response starts
+        endpoint: Any = scope.get("endpoint")
+        return getattr(endpoint, "__cache_policy__", self.default_policy)
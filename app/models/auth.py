@@ -2,7 +2,7 @@ from datetime import UTC, datetime
 from typing import List, Optional
 
 from app.models.base import BaseModel
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -65,6 +65,11 @@ class Permission(BaseModel):
         init=False,
     )
 
+    # Position in permission bitmasks, assigned once and never reused
+    bit_index: Mapped[Optional[int]] = mapped_column(
+        Integer, unique=True, nullable=True, default=None, init=False
+    )
+
 
 # USER ROLE (JOIN TABLE)
 class UserRole(BaseModel):
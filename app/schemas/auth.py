@@ -157,7 +157,7 @@ class TokenType(str, Enum):
 
 
 class TokenBlacklistBase(BaseModel):
-    token: str
+    jti: str
     expires_at: datetime
 
 
@@ -0,0 +1,96 @@
+"""Micro-benchmark of cache key construction.
+
+    python -m app.scripts.bench_cache_keys [iterations]
+
+Compares the templates compiled by the cache decorator against parsing the same templates on
+every call, as the decorator used to, for a typical GET key and for a write that invalidates
+extra keys, patterns and tags.
+"""
+
+import re
+import sys
+import timeit
+from typing import Any
+
+from app.core.utils.cache import _compile_resource_id, _compile_template, _template_fields
+
+KEY_PREFIX = "user:{user_id}:posts"
+TO_INVALIDATE_EXTRA = {"user:{user_id}": "{user_id}", "org:{org_id}:feed": "{org_id}"}
+PATTERNS = ["user:{user_id}:posts:page"]
+TAGS = ["user:{user_id}", "org:{org_id}"]
+KWARGS: dict[str, Any] = {"user_id": 42, "org_id": 7, "post_id": 1234, "db": object()}
+
+
+async def endpoint(request, user_id: int, org_id: int, post_id: int, db: Any) -> None: ...
+
+
+def _parse_format(template: str, kwargs: dict[str, Any]) -> str:
+    fields = re.findall(r"{(.*?)}", template)
+    return template.format(**{field: kwargs[field] for field in fields})
+
+
+def _parse_resource_id(kwargs: dict[str, Any]) -> int:
+    resource_id = None
+    for name, value in kwargs.items():
+        if "id" in name and isinstance(value, int):
+            resource_id = value
+    return resource_id
+
+
+def per_call_get() -> str:
+    return f"{_parse_format(KEY_PREFIX, KWARGS)}:{_parse_resource_id(KWARGS)}"
+
+
+def per_call_write() -> tuple:
+    key = per_call_get()
+    extra = [
+        f"{_parse_format(prefix, KWARGS)}:{_parse_format(id_template, KWARGS)}"
+        for prefix, id_template in TO_INVALIDATE_EXTRA.items()
+    ]
+    patterns = [_parse_format(pattern, KWARGS) + "*" for pattern in PATTERNS]
+    tags = [_parse_format(tag, KWARGS) for tag in TAGS]
+    return key, extra, patterns, tags
+
+
+format_prefix = _compile_template(KEY_PREFIX)
+resolve_resource_id = _compile_resource_id(endpoint, None, int)
+format_extra = [
+    (_compile_template(prefix), _template_fields(id_template)[0])
+    for prefix, id_template in TO_INVALIDATE_EXTRA.items()
+]
+format_patterns = [_compile_template(pattern) for pattern in PATTERNS]
+format_tags = [_compile_template(tag) for tag in TAGS]
+
+
+def compiled_get() -> str:
+    return f"{format_prefix(KWARGS)}:{resolve_resource_id(KWARGS)}"
+
+
+def compiled_write() -> tuple:
+    key = compiled_get()
+    extra = [f"{format_extra_prefix(KWARGS)}:{KWARGS[name]}" for format_extra_prefix, name in format_extra]
+    patterns = [format_pattern(KWARGS) + "*" for format_pattern in format_patterns]
+    tags = [format_tag(KWARGS) for format_tag in format_tags]
+    return key, extra, patterns, tags
+
+
+def _report(name: str, seconds: float, iterations: int) -> None:
+    print(f"  {name:<28} {seconds / iterations * 1e6:8.2f} us/call")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    assert per_call_get() == compiled_get()
+    assert per_call_write() == compiled_write()
+
+    for label, candidates in (
+        ("GET key", {"parsed per call": per_call_get, "compiled": compiled_get}),
+        ("write invalidation", {"parsed per call": per_call_write, "compiled": compiled_write}),
+    ):
+        print(label)
+        for name, build in candidates.items():
+            _report(name, timeit.timeit(build, number=iterations), iterations)
+
+
+if __name__ == "__main__":
+    main()
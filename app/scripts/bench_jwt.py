@@ -0,0 +1,70 @@
+"""Micro-benchmark of access token verification.
+
+    python -m app.scripts.bench_jwt [iterations]
+
+Compares the shared TokenVerifier against plain PyJWT decoding, python-jose (if installed) and
+JWTManager.verify_token, for an HS256 token and an EdDSA token.
+"""
+
+import sys
+import timeit
+from datetime import timedelta
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from shared.auth.jwt_utils import JWTManager
+from shared.auth.keys import KeySet
+from shared.auth.verifier import TokenVerifier
+
+PERMISSIONS = [f"resource{i}:{action}" for i in range(20) for action in ("read", "write")]
+
+
+def _ed25519_keys() -> KeySet:
+    pem = ed25519.Ed25519PrivateKey.generate().private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return KeySet.from_pem(pem.decode())
+
+
+def _report(name: str, seconds: float, iterations: int) -> None:
+    print(f"  {name:<28} {seconds / iterations * 1e6:8.1f} us/token")
+
+
+def bench(label: str, keys: KeySet, iterations: int) -> None:
+    manager = JWTManager(keys=keys)
+    token = manager.create_token("42", "ada", False, PERMISSIONS, timedelta(minutes=30))
+    key = keys.current
+    verifier = TokenVerifier(keys)
+
+    print(f"{label} ({len(token)} byte token)")
+    candidates = {
+        "TokenVerifier.verify": lambda: verifier.verify(token),
+        "jwt.decode (PyJWT)": lambda: jwt.decode(token, key.key, algorithms=[key.algorithm]),
+        "JWTManager.verify_token": lambda: manager.verify_token(token),
+    }
+    if not keys.is_asymmetric:
+        try:
+            from jose import jwt as jose_jwt
+        except ImportError:
+            pass
+        else:
+            candidates["jose.jwt.decode"] = lambda: jose_jwt.decode(
+                token, key.key, algorithms=[key.algorithm]
+            )
+
+    for name, verify in candidates.items():
+        _report(name, timeit.timeit(verify, number=iterations), iterations)
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    bench("HS256", KeySet.from_secret("benchmark-secret"), iterations)
+    bench("EdDSA", _ed25519_keys(), iterations)
+
+
+if __name__ == "__main__":
+    main()
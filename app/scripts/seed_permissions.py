@@ -152,6 +152,10 @@ async def seed_permissions(db: AsyncSession):
                         db.add(role_perm)
 
     await db.commit()
+
+    from app.services.permission_registry import PermissionRegistryService
+
+    await PermissionRegistryService.assign_missing_bits(db)
     print("Permissions and roles seeded successfully!")
 
 
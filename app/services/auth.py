@@ -1,19 +1,24 @@
 from datetime import UTC, datetime, timedelta
 from enum import Enum
 from typing import Any, List, Optional
+from uuid import uuid4
 import bcrypt
 
 from app.core.config import settings
-from app.models.auth import Role, RolePermission, User, UserRole
+from app.core.utils import jwt_keys, revocation
+from app.core.utils.hashing import get_password_hasher
+from app.core.utils.token_cache import verified_tokens
+from app.models.auth import Permission, Role, RolePermission, User, UserRole
 from app.models.token_blacklist import TokenBlacklist
 from app.schemas.auth import TokenData, UserCreate, UserUpdate, TokenType, UserWithRoles, RoleResponse
 from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 from sqlalchemy import or_, select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from shared.auth.claims import COMPACT_FORMAT, compact_claims
 from shared.auth.jwt_utils import JWTManager
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -30,6 +35,16 @@ class AuthService:
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
 
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash on the bounded worker pool instead of the event loop"""
+        return await get_password_hasher().hash(password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verify on the bounded worker pool instead of the event loop"""
+        return await get_password_hasher().verify(plain_password, hashed_password)
+
     # TOKENS
     @staticmethod
     def create_access_token(
@@ -39,8 +54,12 @@ class AuthService:
         expire = datetime.now(UTC) + (
             expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
-        to_encode.update({"exp": expire, "token_type": TokenType.ACCESS})
-        return jwt.encode(to_encode, settings.SECRET_KEY.get_secret_value(), algorithm=settings.ALGORITHM)
+        to_encode.update(
+            {"exp": expire, "token_type": TokenType.ACCESS, "jti": uuid4().hex}
+        )
+        if settings.JWT_TOKEN_FORMAT == COMPACT_FORMAT:
+            to_encode = compact_claims(to_encode)
+        return jwt_keys.encode(to_encode)
 
     @staticmethod
     async def create_refresh_token(
@@ -49,12 +68,10 @@ class AuthService:
         expire = datetime.now(UTC).replace(tzinfo=None) + (
             expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        data.update({"exp": expire, "token_type": TokenType.REFRESH})
-        return jwt.encode(
-            data,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithm=settings.ALGORITHM,
-        )
+        data.update({"exp": expire, "token_type": TokenType.REFRESH, "jti": uuid4().hex})
+        if settings.JWT_TOKEN_FORMAT == COMPACT_FORMAT:
+            data = compact_claims(data)
+        return jwt_keys.encode(data)
 
     # TOKEN VERIFICATION
     @staticmethod
@@ -62,70 +79,98 @@ class AuthService:
         token: str, expected_token_type: TokenType, db: AsyncSession
     ) -> TokenData | None:
 
-        result = await db.execute(
-            select(TokenBlacklist.id).where(TokenBlacklist.token == token)
-        )
-        if result.scalar_one_or_none():
-            return None
-
         try:
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY.get_secret_value(),
-                algorithms=[settings.ALGORITHM],
-            )
-
-            if payload.get("token_type") != expected_token_type:
-                return None
+            payload = jwt_keys.decode(token)
+        except InvalidTokenError:
+            return None
 
-            user_id = payload.get("sub")
-            if not user_id:
-                return None
+        if payload.get("token_type") != expected_token_type:
+            return None
 
-            return TokenData(**payload)
+        user_id = payload.get("sub")
+        if not user_id:
+            return None
 
-        except JWTError:
+        if await AuthService.is_token_revoked(token, payload, db):
             return None
 
+        return TokenData(
+            user_id=user_id,
+            is_superuser=payload.get("is_superuser", False),
+            permissions=payload.get("permissions", []),
+        )
+
     # BLACKLIST
+    @staticmethod
+    async def is_token_revoked(
+        token: str, payload: dict[str, Any], db: AsyncSession
+    ) -> bool:
+        fingerprint = revocation.token_fingerprint(token, payload)
+        revoked = await revocation.store.is_revoked(fingerprint)
+        if revoked is not None:
+            return revoked
+
+        # Redis unavailable or unsure: fall back to the blacklist table
+        result = await db.execute(
+            select(TokenBlacklist.id).where(TokenBlacklist.jti == fingerprint)
+        )
+        return result.scalar_one_or_none() is not None
+
     @staticmethod
     async def blacklist_tokens(
         access_token: str, refresh_token: str, db: AsyncSession
     ) -> None:
 
+        revoked = []
         for token in (access_token, refresh_token):
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY.get_secret_value(),
-                algorithms=[settings.ALGORITHM],
-            )
+            payload = jwt_keys.decode(token)
             exp = payload.get("exp")
             if exp:
+                fingerprint = revocation.token_fingerprint(token, payload)
                 db.add(
                     TokenBlacklist(
-                        token=token,
+                        jti=fingerprint,
                         expires_at=datetime.fromtimestamp(exp),
                     )
                 )
+                revoked.append((fingerprint, exp))
 
         await db.commit()
+        await verified_tokens.evict(tokens=[access_token])
+        for fingerprint, exp in revoked:
+            await revocation.store.revoke(fingerprint, exp)
 
     @staticmethod
     async def blacklist_token(token: str, db: AsyncSession) -> None:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY.get_secret_value(),
-            algorithms=[settings.ALGORITHM],
-        )
+        payload = jwt_keys.decode(token)
         exp = payload.get("exp")
         if exp:
+            fingerprint = revocation.token_fingerprint(token, payload)
             db.add(
                 TokenBlacklist(
-                    token=token,
+                    jti=fingerprint,
                     expires_at=datetime.fromtimestamp(exp),
                 )
             )
             await db.commit()
+            await verified_tokens.evict(tokens=[token])
+            await revocation.store.revoke(fingerprint, exp)
+
+    @staticmethod
+    async def purge_expired_blacklist(db: AsyncSession, batch_size: int) -> int:
+        """Delete up to `batch_size` expired blacklist rows and return how many went"""
+        # expires_at is stored as naive local time, see blacklist_token
+        expired_ids = (
+            select(TokenBlacklist.id)
+            .where(TokenBlacklist.expires_at < datetime.now())
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            delete(TokenBlacklist).where(TokenBlacklist.id.in_(expired_ids))
+        )
+        await db.commit()
+        return result.rowcount
 
     # USERS
 
@@ -139,7 +184,7 @@ class AuthService:
 
         if not user:
             return None
-        if not AuthService.verify_password(password, user.password_hash):
+        if not await AuthService.verify_password_async(password, user.password_hash):
             return None
 
         user.last_login = datetime.now(UTC)
@@ -170,7 +215,7 @@ class AuthService:
         user = User(
             username=user_data.username,
             email=user_data.email,
-            password_hash=AuthService.hash_password(user_data.password),
+            password_hash=await AuthService.hash_password_async(user_data.password),
             is_superuser=(
                 user_data.is_superuser if hasattr(user_data, "is_superuser") else None
             ),
@@ -251,7 +296,7 @@ class AuthService:
         update_data = user_data.model_dump(exclude_unset=True)
 
         if "password" in update_data:
-            update_data["password_hash"] = AuthService.hash_password(
+            update_data["password_hash"] = await AuthService.hash_password_async(
                 update_data.pop("password")
             )
 
@@ -260,34 +305,25 @@ class AuthService:
 
         await db.commit()
         await db.refresh(user)
+        await verified_tokens.evict(user_ids=[user_id])
 
         return user
 
     @staticmethod
     async def get_user_permissions(db: AsyncSession, user_id: str) -> List[str]:
+        """Flattened permissions of a user in a single query.
 
+        Prefer PermissionResolver.get_user_permissions, which caches this result.
+        """
         result = await db.execute(
-            select(User)
-            .options(
-                joinedload(User.user_roles)
-                .joinedload(UserRole.role)
-                .joinedload(Role.role_permissions)
-                .joinedload(RolePermission.permission)
-            )
-            .where(User.id == user_id)
+            select(Permission.resource, Permission.action)
+            .join(RolePermission, RolePermission.permission_id == Permission.id)
+            .join(UserRole, UserRole.role_id == RolePermission.role_id)
+            .where(UserRole.user_id == user_id)
+            .distinct()
         )
 
-        user = result.unique().scalar_one_or_none()
-        if not user:
-            return []
-
-        permissions = {
-            f"{rp.permission.resource}:{rp.permission.action}"
-            for ur in user.user_roles
-            for rp in ur.role.role_permissions
-        }
-
-        return list(permissions)
+        return [f"{resource}:{action}" for resource, action in result.all()]
     
     # TODO: implement this, probably redundant
     @staticmethod
@@ -311,7 +347,7 @@ class AuthService:
         result = await db.execute(stmt)
         user = result.scalar_one_or_none()
         
-        if not user or not AuthService.verify_password(password, user.password_hash):
+        if not user or not await AuthService.verify_password_async(password, user.password_hash):
             return None, None
         
         # Collect all permissions from user's roles
@@ -323,8 +359,7 @@ class AuthService:
         
         # Create JWT token with permissions
         jwt_manager = JWTManager(
-            secret_key=settings.SECRET_KEY.get_secret_value(),
-            algorithm=settings.ALGORITHM
+            keys=jwt_keys.keys, token_format=settings.JWT_TOKEN_FORMAT
         )
         
         access_token = jwt_manager.create_token(
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+
+from app.core.utils import cache
+from app.models.auth import Permission, RolePermission
+from redis.exceptions import RedisError
+from shared.auth.permissions import PermissionRegistry
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LOGGER = logging.getLogger(__name__)
+
+REDIS_KEY = "permissions:registry"
+# pg_advisory_xact_lock key serializing bit assignment across requests and replicas
+BIT_ASSIGNMENT_LOCK = 0x7065726D  # "perm"
+
+# Process-wide registry, replaced wholesale on every reload.
+registry = PermissionRegistry({})
+
+
+async def _unassigned(db: AsyncSession) -> list[Permission]:
+    result = await db.execute(
+        select(Permission)
+        .where(Permission.bit_index.is_(None))
+        .order_by(Permission.created_at, Permission.id)
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars().all())
+
+
+class PermissionRegistryService:
+
+    @staticmethod
+    async def assign_missing_bits(db: AsyncSession) -> int:
+        """Give every permission without a bit index the next free one, in creation order"""
+        pending = await _unassigned(db)
+        if not pending:
+            return 0
+
+        if db.get_bind().dialect.name == "postgresql":
+            # held until commit, so concurrent callers (other requests, other replicas) read the
+            # highest bit only after this one's assignments are saved
+            await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": BIT_ASSIGNMENT_LOCK})
+            pending = await _unassigned(db)
+            if not pending:
+                await db.commit()
+                return 0
+
+        highest = await db.scalar(select(func.max(Permission.bit_index)))
+        next_bit = -1 if highest is None else highest
+        for permission in pending:
+            next_bit += 1
+            permission.bit_index = next_bit
+
+        await db.commit()
+        return len(pending)
+
+    @staticmethod
+    async def load(db: AsyncSession) -> PermissionRegistry:
+        """Rebuild the registry from the database and publish it for other services.
+
+        Assigns missing bits first, so `db` must be a primary session outside any request's unit of
+        work: run it at startup, from the refresh task or after permissions change.
+        """
+        global registry
+
+        await PermissionRegistryService.assign_missing_bits(db)
+
+        result = await db.execute(
+            select(Permission.resource, Permission.action, Permission.bit_index)
+        )
+        bits = {f"{resource}:{action}": bit for resource, action, bit in result.all()}
+
+        result = await db.execute(
+            select(RolePermission.role_id, Permission.bit_index).join(
+                Permission, Permission.id == RolePermission.permission_id
+            )
+        )
+        roles: dict[str, int] = {}
+        for role_id, bit in result.all():
+            roles[role_id] = roles.get(role_id, 0) | 1 << bit
+
+        registry = PermissionRegistry(bits, roles)
+
+        if cache.client is not None:
+            await cache.client.set(REDIS_KEY, json.dumps(registry.to_dict()))
+
+        return registry
+
+    @staticmethod
+    async def get() -> PermissionRegistry | None:
+        """Current registry, or None while this process does not know it.
+
+        Never touches the database, so it is safe on the authentication path: a process that has not
+        loaded the registry yet adopts the snapshot last published to Redis.
+        """
+        global registry
+
+        if len(registry) or cache.client is None:
+            return registry if len(registry) else None
+
+        try:
+            raw = await cache.client.get(REDIS_KEY)
+        except RedisError as e:
+            LOGGER.warning(f"Could not read the permission registry snapshot: {e}")
+            return None
+        if raw is None:
+            return None
+
+        registry = PermissionRegistry.from_dict(json.loads(raw))
+        return registry
+
+
+async def refresh_periodically(session_factory, interval: float) -> None:
+    """Reload the registry every `interval` seconds so other replicas' changes show up."""
+    while True:
+        try:
+            async with session_factory() as db:
+                loaded = await PermissionRegistryService.load(db)
+            LOGGER.debug(f"Loaded permission registry {loaded.version} ({len(loaded)} bits)")
+        except Exception as e:
+            LOGGER.exception(f"Permission registry refresh failed with error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+from app.core.config import settings
+from app.core.utils import cache
+from app.core.utils.ttl_cache import TTLCache
+from app.models.auth import UserRole
+from app.services.auth import AuthService
+from app.services.permission_registry import PermissionRegistryService
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+LOGGER = logging.getLogger(__name__)
+
+# Fetch the generation counter and the set stored under it in one round trip.
+_GET_VERSIONED = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+return {generation, redis.call('GET', KEYS[2] .. generation)}
+"""
+
+_local: TTLCache[str, frozenset[str]] = TTLCache(
+    maxsize=settings.PERMISSION_L1_MAX_SIZE, ttl=settings.PERMISSION_L1_TTL_SECONDS
+)
+
+# Permission sets published for `permissions_ref` token claims, by reference.
+_shared_sets: TTLCache[str, frozenset[str]] = TTLCache(
+    maxsize=settings.PERMISSION_L1_MAX_SIZE, ttl=settings.PERMISSION_CACHE_TTL_SECONDS
+)
+
+SHARED_SET_PREFIX = "permissions:shared:"
+
+
+def _generation_key(user_id: str) -> str:
+    return f"permissions:{{{user_id}}}:gen"
+
+
+def _set_key_prefix(user_id: str) -> str:
+    return f"permissions:{{{user_id}}}:set:"
+
+
+class PermissionResolver:
+    """Flattened `resource:action` permission sets per user.
+
+    Lookups go local L1 -> Redis -> database. Redis entries are versioned by a per-user generation
+    counter: invalidation bumps the counter, so a reader that raced a write can only ever fill a
+    key nobody reads any more. Other processes' L1 copies converge within
+    `PERMISSION_L1_TTL_SECONDS`.
+    """
+
+    @staticmethod
+    async def get_user_permissions(db: AsyncSession, user_id: str) -> frozenset[str]:
+        user_id = str(user_id)
+        permissions = _local.get(user_id)
+        if permissions is not None:
+            return permissions
+
+        # None when Redis is unavailable: resolve from the database and skip the write-back
+        generation: str | None = None
+        if cache.client is not None:
+            try:
+                generation, raw = await cache.client.eval(
+                    _GET_VERSIONED, 2, _generation_key(user_id), _set_key_prefix(user_id)
+                )
+            except RedisError as e:
+                LOGGER.warning(f"Permission cache read failed, using the database: {e}")
+            else:
+                generation = generation.decode() if isinstance(generation, bytes) else generation
+                if raw is not None:
+                    permissions = frozenset(json.loads(raw))
+                    _local.set(user_id, permissions)
+                    return permissions
+
+        permissions = frozenset(await AuthService.get_user_permissions(db, user_id))
+
+        if cache.client is not None and generation is not None:
+            try:
+                await cache.client.set(
+                    f"{_set_key_prefix(user_id)}{generation}",
+                    json.dumps(sorted(permissions)),
+                    ex=settings.PERMISSION_CACHE_TTL_SECONDS,
+                )
+            except RedisError as e:
+                LOGGER.warning(f"Permission cache write failed: {e}")
+        _local.set(user_id, permissions)
+        return permissions
+
+    @staticmethod
+    async def publish_permission_set(permissions: Iterable[str], ttl: int) -> str | None:
+        """Store `permissions` under a content-addressed reference other services can resolve.
+
+        Returns the reference, or None when no shared cache is available.
+        """
+        if cache.client is None:
+            return None
+
+        canonical = json.dumps(sorted(permissions), separators=(",", ":"))
+        reference = hashlib.sha256(canonical.encode()).hexdigest()[:22]
+        try:
+            await cache.client.set(f"{SHARED_SET_PREFIX}{reference}", canonical, ex=ttl)
+        except RedisError as e:
+            LOGGER.warning(f"Could not publish permission set: {e}")
+            return None
+        _shared_sets.set(reference, frozenset(json.loads(canonical)))
+        return reference
+
+    @staticmethod
+    async def resolve_permission_set(reference: str) -> frozenset[str] | None:
+        permissions = _shared_sets.get(reference)
+        if permissions is not None or cache.client is None:
+            return permissions
+
+        try:
+            raw = await cache.client.get(f"{SHARED_SET_PREFIX}{reference}")
+        except RedisError as e:
+            LOGGER.warning(f"Could not resolve permission set: {e}")
+            return None
+        if raw is None:
+            return None
+
+        permissions = frozenset(json.loads(raw))
+        _shared_sets.set(reference, permissions)
+        return permissions
+
+    @staticmethod
+    async def permission_claims(db: AsyncSession, user_id: str) -> dict[str, Any]:
+        """Permission claims for a new access token, in the configured representation"""
+        permissions = sorted(await PermissionResolver.get_user_permissions(db, user_id))
+        representation = settings.JWT_PERMISSION_CLAIM
+
+        registry = await PermissionRegistryService.get()
+        if representation == "bitmask" and registry is not None:
+            return {"pmask": registry.encode_mask(registry.mask(permissions)), "pmv": registry.version}
+
+        if representation == "roles" and registry is not None:
+            result = await db.execute(
+                select(UserRole.role_id).where(UserRole.user_id == user_id)
+            )
+            return {"roles": sorted(result.scalars().all()), "pmv": registry.version}
+
+        if representation == "reference":
+            # outlive every token minted against it
+            ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 + 60
+            reference = await PermissionResolver.publish_permission_set(permissions, ttl)
+            if reference is not None:
+                return {"permissions_ref": reference}
+
+        return {"permissions": permissions}
+
+    @staticmethod
+    async def invalidate_users(user_ids: Iterable[str]) -> None:
+        user_ids = [str(user_id) for user_id in user_ids]
+        for user_id in user_ids:
+            _local.pop(user_id)
+
+        if cache.client is None or not user_ids:
+            return
+
+        try:
+            async with cache.client.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.incr(_generation_key(user_id))
+                await pipe.execute()
+        except RedisError as e:
+            # cached sets expire after PERMISSION_CACHE_TTL_SECONDS at the latest
+            LOGGER.error(f"Could not invalidate cached permissions of {len(user_ids)} users: {e}")
+
+    @staticmethod
+    async def invalidate_user(user_id: str) -> None:
+        await PermissionResolver.invalidate_users((user_id,))
+
+    @staticmethod
+    async def invalidate_role(db: AsyncSession, role_id: str) -> None:
+        """Invalidate every user currently holding `role_id`."""
+        result = await db.execute(
+            select(UserRole.user_id).where(UserRole.role_id == role_id)
+        )
+        await PermissionResolver.invalidate_users(result.scalars().all())
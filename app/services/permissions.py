@@ -1,9 +1,18 @@
-from app.models.auth import Permission, RolePermission
+from typing import Any
+
+from app.core.utils.token_cache import verified_tokens
+from app.messaging.outbox import OutboxService
+from app.models.auth import Permission, RolePermission, UserRole
 from app.schemas.auth import PermissionCreate
+from app.services.permission_registry import PermissionRegistryService
+from app.services.permission_resolver import PermissionResolver
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+USER_ROLE_EVENTS = {"user.role.assigned", "user.role.removed"}
+ROLE_PERMISSION_EVENTS = {"role.permission.granted", "role.permission.removed"}
+
 
 class PermissionService:
 
@@ -62,6 +71,14 @@ class PermissionService:
             permission_id=permission_id,
         )
         db.add(role_perm)
+        permission = await db.get(Permission, permission_id)
+        OutboxService.add(
+            db,
+            "role.permission.granted",
+            role_id=role_id,
+            permission_id=permission_id,
+            permission_name=f"{permission.resource}:{permission.action}" if permission else None,
+        )
         await db.commit()
         await db.refresh(role_perm)
 
@@ -90,4 +107,30 @@ class PermissionService:
             )
 
         await db.delete(role_perm)
+        permission = await db.get(Permission, permission_id)
+        OutboxService.add(
+            db,
+            "role.permission.removed",
+            role_id=role_id,
+            permission_id=permission_id,
+            permission_name=f"{permission.resource}:{permission.action}" if permission else None,
+        )
         await db.commit()
+
+    @staticmethod
+    async def apply_outbox_events(db: AsyncSession, events: list[dict[str, Any]]) -> None:
+        """Refresh permission caches and the registry after role and permission changes.
+
+        Run by the outbox relay, so the mutations themselves only stage their event and commit.
+        """
+        user_ids = {event["user_id"] for event in events if event["event_type"] in USER_ROLE_EVENTS}
+        role_ids = {event["role_id"] for event in events if event["event_type"] in ROLE_PERMISSION_EVENTS}
+        if role_ids:
+            result = await db.execute(select(UserRole.user_id).where(UserRole.role_id.in_(role_ids)))
+            user_ids.update(result.scalars().all())
+
+        await PermissionResolver.invalidate_users(user_ids)
+        if user_ids:
+            await verified_tokens.evict(user_ids=user_ids)
+        if role_ids:
+            await PermissionRegistryService.load(db)
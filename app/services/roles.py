@@ -1,5 +1,6 @@
 from typing import Optional
 
+from app.messaging.outbox import OutboxService
 from app.models.auth import Role, RolePermission, UserRole
 from app.schemas.auth import RoleCreate
 from fastapi import HTTPException, status
@@ -59,6 +60,14 @@ class RoleService:
 
         user_role = UserRole(user_id=user_id, role_id=role_id)
         db.add(user_role)
+        role = await db.get(Role, role_id)
+        OutboxService.add(
+            db,
+            "user.role.assigned",
+            user_id=user_id,
+            role_id=role_id,
+            role_name=role.name if role else None,
+        )
         await db.commit()
         await db.refresh(user_role)
 
@@ -81,4 +90,12 @@ class RoleService:
             )
 
         await db.delete(user_role)
+        role = await db.get(Role, role_id)
+        OutboxService.add(
+            db,
+            "user.role.removed",
+            user_id=user_id,
+            role_id=role_id,
+            role_name=role.name if role else None,
+        )
         await db.commit()
@@ -0,0 +1,47 @@
+from typing import Any
+
+# Format version claim. Absent means the original verbose format (1).
+FORMAT_CLAIM = "v"
+COMPACT_FORMAT = 2
+
+# Verbose claim name -> compact claim name. Registered JWT claims (sub, exp, jti) are kept.
+COMPACT_NAMES = {
+    "username": "un",
+    "is_superuser": "su",
+    "token_type": "tt",
+    "permissions": "p",
+    "pmask": "pm",
+    "pmv": "pmv",
+    "roles": "rl",
+    "permissions_ref": "pr",
+}
+VERBOSE_NAMES = {compact: verbose for verbose, compact in COMPACT_NAMES.items()}
+
+
+def compact_claims(claims: dict[str, Any]) -> dict[str, Any]:
+    """Rename claims to their short form and tag the payload as format 2.
+
+    `is_superuser` is only emitted when true, as `su: 1`.
+    """
+    compact: dict[str, Any] = {FORMAT_CLAIM: COMPACT_FORMAT}
+    for name, value in claims.items():
+        if name == "is_superuser":
+            if value:
+                compact["su"] = 1
+            continue
+        compact[COMPACT_NAMES.get(name, name)] = value
+    return compact
+
+
+def expand_claims(payload: dict[str, Any]) -> dict[str, Any]:
+    """Return `payload` with verbose claim names, whatever format it was minted in."""
+    if payload.get(FORMAT_CLAIM) != COMPACT_FORMAT:
+        return payload
+
+    expanded = {
+        VERBOSE_NAMES.get(name, name): value
+        for name, value in payload.items()
+        if name != FORMAT_CLAIM
+    }
+    expanded["is_superuser"] = bool(expanded.get("is_superuser"))
+    return expanded
@@ -1,7 +1,12 @@
 from datetime import datetime, timedelta, UTC
-from typing import Optional, List
-from jose import JWTError, jwt
+from typing import Any, Callable, Iterable, Optional, List
+from uuid import uuid4
+import jwt
 from pydantic import BaseModel
+from shared.auth.claims import COMPACT_FORMAT, compact_claims
+from shared.auth.keys import KeySet
+from shared.auth.verifier import Claims, TokenVerifier
+from shared.auth.permissions import PermissionRegistry
 
 
 class TokenData(BaseModel):
@@ -15,11 +20,35 @@ class TokenData(BaseModel):
 
 
 class JWTManager:
-    """Shared JWT token management"""
+    """Shared JWT token management
 
-    def __init__(self, secret_key: str, algorithm: str = "HS256"):
-        self.secret_key = secret_key
-        self.algorithm = algorithm
+    With a `registry`, tokens carry permissions as an encoded bitmask (`pmask`) over the
+    auth service's permission registry instead of a list of strings. `token_format=2` mints
+    short claim names; both formats are always accepted when verifying.
+    `permission_set_resolver` looks up the set behind a `permissions_ref` claim, typically
+    from the shared Redis cache.
+
+    Instead of a shared `secret_key`, issuers can pass a `KeySet` holding their private key and
+    verifiers a `JWKSCache` of the issuer's public keys (run `JWKSCache.run()` as a background
+    task so verification never waits on a fetch).
+    """
+
+    def __init__(
+        self,
+        secret_key: Optional[str] = None,
+        algorithm: str = "HS256",
+        registry: Optional[PermissionRegistry] = None,
+        token_format: int = 1,
+        permission_set_resolver: Optional[Callable[[str], Optional[Iterable[str]]]] = None,
+        keys: Optional[Any] = None,
+    ):
+        if keys is None and secret_key is None:
+            raise ValueError("JWTManager needs a secret_key or keys")
+        self.keys = keys if keys is not None else KeySet.from_secret(secret_key, algorithm)
+        self.verifier = TokenVerifier(self.keys)
+        self.registry = registry
+        self.token_format = token_format
+        self.permission_set_resolver = permission_set_resolver
 
     def create_token(
         self,
@@ -34,32 +63,51 @@ class JWTManager:
             "sub": user_id,
             "username": username,
             "is_superuser": is_superuser,
-            "permissions": permissions,
         }
+        if self.registry is not None:
+            to_encode["pmask"] = self.registry.encode_mask(self.registry.mask(permissions))
+            to_encode["pmv"] = self.registry.version
+        else:
+            to_encode["permissions"] = permissions
 
         if expires_delta:
             expire = datetime.now(UTC) + expires_delta
         else:
             expire = datetime.now(UTC) + timedelta(minutes=30)
 
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": uuid4().hex})
+        if self.token_format == COMPACT_FORMAT:
+            to_encode = compact_claims(to_encode)
+
+        return self.keys.sign(to_encode)
 
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+    def verify_claims(self, token: str) -> Optional[Claims]:
+        """Verify JWT token and return its claims, without building a TokenData"""
+        try:
+            return self.verifier.verify(token)
+        except jwt.InvalidTokenError:
+            return None
+
+    def permissions(self, claims: Claims) -> List[str]:
+        """Permission names carried by `claims`, whichever representation they use"""
+        if claims.pmask and self.registry is not None:
+            return self.registry.names(PermissionRegistry.decode_mask(claims.pmask))
+        if claims.roles is not None and self.registry is not None:
+            return self.registry.names(self.registry.role_mask(claims.roles))
+        if claims.permissions_ref is not None and self.permission_set_resolver is not None:
+            return list(self.permission_set_resolver(claims.permissions_ref) or [])
+        return claims.permissions or []
 
     def verify_token(self, token: str) -> Optional[TokenData]:
         """Verify and decode JWT token"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-
-            token_data = TokenData(
-                user_id=payload.get("sub"),
-                username=payload.get("username"),
-                is_superuser=payload.get("is_superuser", False),
-                permissions=payload.get("permissions", []),
-                exp=datetime.fromtimestamp(payload.get("exp")),
-            )
-
-            return token_data
-        except JWTError:
+        claims = self.verify_claims(token)
+        if claims is None:
             return None
+
+        return TokenData(
+            user_id=claims.sub,
+            username=claims.username,
+            is_superuser=claims.is_superuser,
+            permissions=self.permissions(claims),
+            exp=datetime.fromtimestamp(claims.exp) if claims.exp is not None else None,
+        )
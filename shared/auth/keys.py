@@ -0,0 +1,201 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+LOGGER = logging.getLogger(__name__)
+
+# RFC 7638 members hashed into a key's thumbprint, by key type
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass(frozen=True, slots=True)
+class VerificationKey:
+    kid: Optional[str]
+    algorithm: str
+    key: Any
+
+
+def algorithm_for(public_key: Any) -> str:
+    """Default JWS algorithm for an asymmetric public key."""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RS256"
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}[public_key.curve.name]
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+    raise ValueError(f"Unsupported key type {type(public_key).__name__}")
+
+
+def public_jwk(key: VerificationKey) -> dict[str, Any]:
+    jwk = jwt.get_algorithm_by_name(key.algorithm).to_jwk(key.key, as_dict=True)
+    jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+    return jwk
+
+
+def thumbprint(public_key: Any, algorithm: str) -> str:
+    """RFC 7638 JWK thumbprint, used as the default key id."""
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(public_key, as_dict=True)
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":")).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeySet:
+    """Signing key of the token issuer plus every key its tokens may still be verified with.
+
+    With an HMAC secret this is a single shared key, as before. With an asymmetric key the public
+    halves are published as a JWKS, so verifiers never hold signing material; retired public keys
+    stay in the set until the tokens they signed have expired.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: Any,
+        kid: Optional[str] = None,
+        verification_keys: Iterable[VerificationKey] = (),
+    ):
+        self.algorithm = algorithm
+        self.kid = kid
+        self._signing_key = signing_key
+        public_key = signing_key.public_key() if hasattr(signing_key, "public_key") else signing_key
+        self.current = VerificationKey(kid, algorithm, public_key)
+        self._keys = {key.kid: key for key in verification_keys}
+        self._keys[kid] = self.current
+
+    @classmethod
+    def from_secret(cls, secret: str, algorithm: str = "HS256") -> "KeySet":
+        return cls(algorithm, secret)
+
+    @classmethod
+    def from_pem(
+        cls,
+        private_pem: str,
+        algorithm: Optional[str] = None,
+        kid: Optional[str] = None,
+        previous_public_pems: Iterable[str] = (),
+        previous_kids: Iterable[Optional[str]] = (),
+    ) -> "KeySet":
+        """Key set signing with `private_pem` and still accepting tokens of the previous keys.
+
+        A previous key is accepted under its RFC 7638 thumbprint and, when the matching entry of
+        `previous_kids` is set, under that configured kid as well, which is what tokens signed with
+        an explicit `kid` carry.
+        """
+        private_key = load_pem_private_key(private_pem.encode(), password=None)
+        algorithm = algorithm or algorithm_for(private_key.public_key())
+        previous = []
+        previous_kids = list(previous_kids)
+        for i, pem in enumerate(previous_public_pems):
+            public_key = load_pem_public_key(pem.encode())
+            previous_algorithm = algorithm_for(public_key)
+            configured_kid = previous_kids[i] if i < len(previous_kids) else None
+            for previous_kid in dict.fromkeys((configured_kid, thumbprint(public_key, previous_algorithm))):
+                if previous_kid:
+                    previous.append(VerificationKey(previous_kid, previous_algorithm, public_key))
+        return cls(
+            algorithm,
+            private_key,
+            kid or thumbprint(private_key.public_key(), algorithm),
+            previous,
+        )
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return not self.algorithm.startswith("HS")
+
+    def sign(self, claims: Mapping[str, Any]) -> str:
+        headers = {"kid": self.kid} if self.kid else None
+        return jwt.encode(dict(claims), self._signing_key, algorithm=self.algorithm, headers=headers)
+
+    def verification_key(self, kid: Optional[str]) -> Optional[VerificationKey]:
+        # tokens minted before key ids were introduced carry none
+        if kid is None:
+            return self.current
+        return self._keys.get(kid)
+
+    def jwks(self) -> dict[str, Any]:
+        if not self.is_asymmetric:
+            return {"keys": []}
+        return {"keys": [public_jwk(key) for key in self._keys.values()]}
+
+
+class JWKSCache:
+    """Verifier-side copy of an issuer's JWKS.
+
+    Lookups never do I/O: keys are fetched by `run()` in the background, every `refresh_interval`
+    seconds (or sooner if the issuer's `Cache-Control: max-age` says so). An unknown key id fails
+    verification and wakes the refresher, at most once per `min_refresh_interval`, so a rotation
+    is picked up without a fetch in the request path.
+    """
+
+    def __init__(self, url: str, refresh_interval: float = 300.0, min_refresh_interval: float = 30.0):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: dict[str, VerificationKey] = {}
+        self._wake = asyncio.Event()
+        self._last_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def verification_key(self, kid: Optional[str]) -> Optional[VerificationKey]:
+        key = self._keys.get(kid) if kid is not None else None
+        if key is None and time.monotonic() - self._last_refresh >= self.min_refresh_interval:
+            self._wake.set()
+        return key
+
+    def load(self, jwks: Mapping[str, Any]) -> None:
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            algorithm = jwk.get("alg")
+            if not algorithm or "kid" not in jwk:
+                continue
+            key = jwt.get_algorithm_by_name(algorithm).from_jwk(jwk)
+            keys[jwk["kid"]] = VerificationKey(jwk["kid"], algorithm, key)
+        self._keys = keys
+
+    async def refresh(self, client: httpx.AsyncClient) -> float:
+        """Fetch the JWKS once; returns the number of seconds until the next refresh."""
+        self._last_refresh = time.monotonic()
+        response = await client.get(self.url)
+        response.raise_for_status()
+        self.load(response.json())
+
+        max_age = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        if max_age:
+            return max(self.min_refresh_interval, min(self.refresh_interval, int(max_age.group(1))))
+        return self.refresh_interval
+
+    async def run(self) -> None:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            while True:
+                delay = self.min_refresh_interval
+                try:
+                    delay = await self.refresh(client)
+                except Exception as e:
+                    LOGGER.exception(f"JWKS refresh from {self.url} failed with error: {e}")
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                    await asyncio.sleep(
+                        max(0.0, self.min_refresh_interval - (time.monotonic() - self._last_refresh))
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+WILDCARD = "*"
+
+
+class PermissionSet:
+    """Compiled `resource:action` grants.
+
+    Grants may use `*` for the resource, the action or both (`employee:*`, `*:read`, `*:*`).
+    Wildcards are resolved once here so each check is at most three set lookups.
+    """
+
+    __slots__ = ("_exact", "_resources", "_actions", "_all")
+
+    def __init__(self, grants: Iterable[str]):
+        exact: set[str] = set()
+        resources: set[str] = set()
+        actions: set[str] = set()
+        grant_all = False
+
+        for grant in grants:
+            resource, _, action = grant.partition(":")
+            if resource == WILDCARD and action == WILDCARD:
+                grant_all = True
+            elif action == WILDCARD:
+                resources.add(resource)
+            elif resource == WILDCARD:
+                actions.add(action)
+            else:
+                exact.add(grant)
+
+        self._exact = frozenset(exact)
+        self._resources = frozenset(resources)
+        self._actions = frozenset(actions)
+        self._all = grant_all
+
+    def allows(self, required: str) -> bool:
+        if self._all or required in self._exact:
+            return True
+        if not self._resources and not self._actions:
+            return False
+        resource, _, action = required.partition(":")
+        return resource in self._resources or action in self._actions
+
+    __contains__ = allows
+
+
+@lru_cache(maxsize=1024)
+def _compile(grants: frozenset[str]) -> PermissionSet:
+    return PermissionSet(grants)
+
+
+def compile_permissions(grants: Iterable[str]) -> PermissionSet:
+    """Compile `grants`, sharing the result between identical grant sets (e.g. same role)."""
+    return _compile(frozenset(grants))
+
+
+class PermissionRegistry:
+    """Stable `resource:action` -> bit index mapping shared by every service.
+
+    Grants become integer bitmasks so a check is a single AND, and a token can carry a compact
+    encoded mask instead of a list of strings. Bit indexes are owned by the auth service and never
+    reused, so a mask stays valid while the registry grows; `version` only tells verifiers that
+    their copy may be missing newer permissions.
+    """
+
+    __slots__ = ("_bits", "_names", "_roles", "version")
+
+    def __init__(self, bits: Mapping[str, int], roles: Mapping[str, int] | None = None):
+        self._bits = dict(bits)
+        self._names = {bit: name for name, bit in self._bits.items()}
+        self._roles = dict(roles or {})
+        canonical = json.dumps(sorted(self._bits.items()), separators=(",", ":"))
+        self.version = hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def bit(self, permission: str) -> int | None:
+        return self._bits.get(permission)
+
+    def mask(self, grants: Iterable[str]) -> int:
+        """Bitmask of `grants`, with wildcards expanded against the known permissions."""
+        mask = 0
+        for grant in grants:
+            bit = self._bits.get(grant)
+            if bit is not None:
+                mask |= 1 << bit
+            elif WILDCARD in grant:
+                compiled = PermissionSet((grant,))
+                for name, bit in self._bits.items():
+                    if compiled.allows(name):
+                        mask |= 1 << bit
+        return mask
+
+    def role_mask(self, role_ids: Iterable[str]) -> int:
+        mask = 0
+        for role_id in role_ids:
+            mask |= self._roles.get(role_id, 0)
+        return mask
+
+    def names(self, mask: int) -> list[str]:
+        names = []
+        bit = 0
+        while mask:
+            if mask & 1 and bit in self._names:
+                names.append(self._names[bit])
+            mask >>= 1
+            bit += 1
+        return names
+
+    def allows(self, mask: int, required: str) -> bool:
+        bit = self._bits.get(required)
+        return bit is not None and bool(mask >> bit & 1)
+
+    @staticmethod
+    def encode_mask(mask: int) -> str:
+        """URL-safe base64 of the little-endian mask bytes, without padding."""
+        raw = mask.to_bytes(max(1, (mask.bit_length() + 7) // 8), "little")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode_mask(value: str) -> int:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        return int.from_bytes(raw, "little")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"version": self.version, "permissions": self._bits, "roles": self._roles}
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PermissionRegistry":
+        return cls(data.get("permissions", {}), data.get("roles"))
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+import time
+from typing import Any, Optional
+
+import jwt
+from shared.auth.claims import expand_claims
+
+# Header segments are identical for every token signed with the same key, so only a handful exist.
+_MAX_HEADERS = 64
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class Claims:
+    """Verified token claims (verbose names, whatever format the token was minted in)."""
+
+    __slots__ = (
+        "sub",
+        "jti",
+        "exp",
+        "token_type",
+        "username",
+        "is_superuser",
+        "permissions",
+        "pmask",
+        "pmv",
+        "roles",
+        "permissions_ref",
+        "payload",
+    )
+
+    def __init__(self, payload: dict[str, Any]):
+        self.payload = payload
+        self.sub: Optional[str] = payload.get("sub")
+        self.jti: Optional[str] = payload.get("jti")
+        self.exp: Optional[float] = payload.get("exp")
+        self.token_type: Optional[str] = payload.get("token_type")
+        self.username: Optional[str] = payload.get("username")
+        self.is_superuser: bool = bool(payload.get("is_superuser", False))
+        self.permissions: Optional[list[str]] = payload.get("permissions")
+        self.pmask: Optional[str] = payload.get("pmask")
+        self.pmv: Optional[str] = payload.get("pmv")
+        self.roles: Optional[list[str]] = payload.get("roles")
+        self.permissions_ref: Optional[str] = payload.get("permissions_ref")
+
+
+class TokenVerifier:
+    """Single JWT verification path for the auth service and downstream services.
+
+    Verifies against a `KeySet` or `JWKSCache`. Parsed headers and prepared keys are kept between
+    calls, so a token costs one signature check, one JSON parse and the `exp`/`nbf` comparisons.
+    The key is still looked up by `kid` on every call, so keys dropped from the set stop verifying
+    straight away. Errors are the usual `jwt.InvalidTokenError` subclasses.
+    """
+
+    def __init__(self, keys: Any, leeway: float = 0.0, require_sub: bool = True):
+        self.keys = keys
+        self.leeway = leeway
+        self.require_sub = require_sub
+        self._headers: dict[str, tuple[Optional[str], Optional[str]]] = {}
+        self._prepared: dict[int, tuple[Any, Any, Any]] = {}
+
+    def _header(self, segment: str) -> tuple[Optional[str], Optional[str]]:
+        header = self._headers.get(segment)
+        if header is None:
+            try:
+                parsed = json.loads(_b64decode(segment))
+            except (binascii.Error, ValueError) as e:
+                raise jwt.DecodeError("Invalid header") from e
+            if not isinstance(parsed, dict):
+                raise jwt.DecodeError("Invalid header")
+            header = (parsed.get("kid"), parsed.get("alg"))
+            if len(self._headers) >= _MAX_HEADERS:
+                self._headers.clear()
+            self._headers[segment] = header
+        return header
+
+    def _algorithm(self, key: Any) -> tuple[Any, Any]:
+        entry = self._prepared.get(id(key))
+        if entry is None or entry[0] is not key:
+            algorithm = jwt.get_algorithm_by_name(key.algorithm)
+            entry = (key, algorithm, algorithm.prepare_key(key.key))
+            if len(self._prepared) >= _MAX_HEADERS:
+                self._prepared.clear()
+            self._prepared[id(key)] = entry
+        return entry[1], entry[2]
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify `token` and return its claims dict."""
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header_segment, _, payload_segment = signing_input.partition(".")
+            if not payload_segment:
+                raise jwt.DecodeError("Not enough segments")
+            signature = _b64decode(signature)
+        except (AttributeError, binascii.Error, ValueError) as e:
+            raise jwt.DecodeError("Invalid token") from e
+
+        kid, alg = self._header(header_segment)
+        key = self.keys.verification_key(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+        if alg != key.algorithm:
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+
+        algorithm, prepared = self._algorithm(key)
+        if not algorithm.verify(signing_input.encode(), prepared, signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        try:
+            payload = json.loads(_b64decode(payload_segment))
+        except (binascii.Error, ValueError) as e:
+            raise jwt.DecodeError("Invalid payload") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload")
+
+        now = time.time()
+        exp = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise jwt.DecodeError("Expiration Time claim (exp) must be a number")
+            if exp <= now - self.leeway:
+                raise jwt.ExpiredSignatureError("Signature has expired")
+        nbf = payload.get("nbf")
+        if isinstance(nbf, (int, float)) and nbf > now + self.leeway:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+
+        payload = expand_claims(payload)
+        if self.require_sub and not isinstance(payload.get("sub"), str):
+            raise jwt.MissingRequiredClaimError("sub")
+        return payload
+
+    def verify(self, token: str) -> Claims:
+        return Claims(self.decode(token))
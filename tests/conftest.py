@@ -1,7 +1,7 @@
 from typing import AsyncGenerator
 import pytest_asyncio
 from app.core.config import settings
-from app.core.db import Base, async_get_db
+from app.core.db import Base, async_get_db, async_get_read_db
 from app.main import app
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
@@ -48,6 +48,7 @@ async def client(db_session: AsyncSession):
         yield db_session
 
     app.dependency_overrides[async_get_db] = override_get_db
+    app.dependency_overrides[async_get_read_db] = override_get_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
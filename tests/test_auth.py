@@ -4,8 +4,10 @@ from httpx import AsyncClient
 from sqlalchemy import delete
 
 from app.core.config import settings
+from app.messaging.outbox import relay_batch
 from app.models.auth import User
 from app.services.auth import AuthService
+from app.services.permissions import PermissionService
 
 
 @pytest.mark.asyncio
@@ -170,7 +172,23 @@ async def test_user_gets_role_permissions_in_token(
     print("User me response:", user_me_res.status_code, user_me_res.json())
     assert user_me_res.status_code == 200
 
-    print("\n[STEP 9] Admin creates a normal user")
+    print("\n[STEP 9] Outbox relay refreshes the permission registry")
+    async def send(events):
+        return [None] * len(events)
+
+    while await relay_batch(db_session, send, 100, apply=PermissionService.apply_outbox_events):
+        pass
+
+    print("\n[STEP 10] Permission registry is admin-only")
+    assert (await client.get("/api/v1/auth/permissions/registry")).status_code == 401
+    assert (
+        await client.get("/api/v1/auth/permissions/registry", headers=hr_headers)
+    ).status_code == 403
+    registry_res = await client.get("/api/v1/auth/permissions/registry", headers=admin_headers)
+    assert registry_res.status_code == 200
+    assert expected_permissions <= registry_res.json()["permissions"].keys()
+
+    print("\n[STEP 11] Admin creates a normal user")
     user_create_res = await client.post(
         "/api/v1/auth/create-user",
         json={
@@ -184,7 +202,7 @@ async def test_user_gets_role_permissions_in_token(
     print("Create user response:", user_create_res.status_code, user_create_res.json())
     assert user_create_res.status_code == 201
 
-    print("\n[STEP 10] Cleanup")
+    print("\n[STEP 12] Cleanup")
     await db_session.execute(delete(User))
     await db_session.commit()
 
@@ -0,0 +1,282 @@
+import asyncio
+import json
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.core.config import settings
+from app.core.exceptions.cache_exceptions import UncacheableResponseError
+from app.core.utils import cache
+from app.core.utils.cache import LOCK_PREFIX, TAG_PREFIX, _LocalEntry
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    raw_headers = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw_headers, "query_string": b""})
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(cache, "client", client)
+    return client
+
+
+def endpoint(calls: list[int], **options):
+    """A cached endpoint returning how many times it has been computed."""
+
+    @cache.cache(key_prefix="item", resource_id_name="item_id", expiration=60, **options)
+    async def read_item(request: Request, item_id: int):
+        calls.append(item_id)
+        await asyncio.sleep(0.01)
+        return {"version": len(calls)}
+
+    return read_item
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, lock_ttl=1)
+
+    results = await asyncio.gather(*(read_item(request(), item_id=1) for _ in range(5)))
+
+    assert calls == [1] and results == [{"version": 1}] * 5
+    assert await redis.get(f"{LOCK_PREFIX}item:1") is None
+    assert await read_item(request(), item_id=1) == {"version": 1}
+
+
+@pytest.mark.asyncio
+async def test_miss_computes_after_waiting_out_a_held_lock(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, lock_ttl=0.2)
+    # another process took the lock and never wrote the value
+    await redis.set(f"{LOCK_PREFIX}item:1", "other", px=200)
+
+    assert await read_item(request(), item_id=1) == {"version": 1}
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_held_lock_serves_the_stale_copy(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, lock_ttl=0.2, stale_ttl=60)
+    assert await read_item(request(), item_id=1) == {"version": 1}
+
+    # the value expired and another process is recomputing it
+    await redis.delete("item:1")
+    await redis.set(f"{LOCK_PREFIX}item:1", "other", px=200)
+
+    assert await read_item(request(), item_id=1) == {"version": 1}
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_stale_copy_is_not_served_after_its_tag_is_invalidated(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, lock_ttl=0.2, stale_ttl=60, tags=["item:{item_id}"])
+    assert await read_item(request(), item_id=1) == {"version": 1}
+
+    await cache.invalidate([], tags=["item:1"])
+    await redis.set(f"{LOCK_PREFIX}item:1", "other", px=200)
+
+    assert await read_item(request(), item_id=1) == {"version": 2}
+    assert calls == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_tag_bump_hides_entries_cached_under_the_tag(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, tags=["item:{item_id}"])
+    assert await read_item(request(), item_id=1) == {"version": 1}
+    assert await read_item(request(), item_id=2) == {"version": 2}
+    assert await read_item(request(), item_id=1) == {"version": 1}
+
+    assert await cache.invalidate([], tags=["item:1"]) == 0
+    # the entry is still in Redis, but written under the previous generation
+    assert await redis.exists("item:1")
+
+    assert await read_item(request(), item_id=1) == {"version": 3}
+    assert await read_item(request(), item_id=2) == {"version": 2}
+    assert calls == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_raw_response_hits_and_revalidates(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, raw_response=True)
+
+    first = await read_item(request(), item_id=1)
+    hit = await read_item(request(), item_id=1)
+    assert calls == [1]
+    assert hit.body == first.body == b'{"version":1}' and hit.media_type == "application/json"
+    etag = hit.headers["ETag"]
+
+    not_modified = await read_item(request(headers={"If-None-Match": etag}), item_id=1)
+    assert not_modified.status_code == 304 and not_modified.body == b"" and not_modified.headers["ETag"] == etag
+    assert (await read_item(request(headers={"If-None-Match": '"other"'}), item_id=1)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_raw_response_keeps_the_handlers_response(redis):
+    @cache.cache(key_prefix="page", resource_id_name="page_id", raw_response=True)
+    async def read_page(request: Request, page_id: int):
+        return Response(content=b"<p>page</p>", media_type="text/html")
+
+    await read_page(request(), page_id=1)
+    hit = await read_page(request(), page_id=1)
+    assert hit.body == b"<p>page</p>" and hit.media_type == "text/html"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_not_cached(redis):
+    @cache.cache(key_prefix="export", resource_id_name="export_id", raw_response=True, lock_ttl=1)
+    async def export(request: Request, export_id: int):
+        return StreamingResponse(iter([b"row\n"]))
+
+    with pytest.raises(UncacheableResponseError):
+        await export(request(), export_id=1)
+    assert await redis.keys("*export*") == []
+
+
+class FlakyPubSub:
+    def __init__(self, client):
+        self.client = client
+
+    async def subscribe(self, channel):
+        self.client.subscriptions += 1
+        if self.client.subscriptions == 1:
+            raise RedisConnectionError("connection reset")
+
+    async def listen(self):
+        await asyncio.Event().wait()
+        yield
+
+    async def aclose(self):
+        pass
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.subscriptions = 0
+
+    def pubsub(self):
+        return FlakyPubSub(self)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_listener_reconnects_and_clears_the_local_tier(monkeypatch):
+    monkeypatch.setattr(cache, "client", FlakyRedis())
+    cache._local.clear()
+    # cached before the subscription dropped: invalidations may have been missed since
+    cache._local.set("item:1", _LocalEntry(b"{}", frozenset()), ttl=60)
+
+    listener = asyncio.create_task(cache.listen_for_invalidations(max_backoff=0))
+    for _ in range(100):
+        await asyncio.sleep(0)
+        if cache.client.subscriptions == 2:
+            break
+    listener.cancel()
+
+    assert cache.client.subscriptions == 2 and cache._local.get("item:1") is None
+
+
+@pytest.mark.asyncio
+async def test_local_hit_skips_redis(redis):
+    cache._local.clear()
+    calls: list[int] = []
+    read_item = endpoint(calls, local_ttl=60)
+    assert (await read_item(request(), item_id=1)).body == b'{"version":1}'
+
+    await redis.flushall()
+    assert (await read_item(request(), item_id=1)).body == b'{"version":1}'
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_published_invalidations_evict_local_entries(redis):
+    listener = asyncio.create_task(cache.listen_for_invalidations())
+    while (await redis.pubsub_numsub(settings.CACHE_INVALIDATION_CHANNEL))[0][1] == 0:
+        await asyncio.sleep(0.01)
+    cache._local.set("item:1", _LocalEntry(b"{}", frozenset()), ttl=60)
+    cache._local.set("item:2", _LocalEntry(b"{}", frozenset(["user:1"])), ttl=60)
+
+    # a malformed message is skipped, not fatal to the listener
+    await redis.publish(settings.CACHE_INVALIDATION_CHANNEL, "not json")
+    await redis.publish(settings.CACHE_INVALIDATION_CHANNEL, '{"keys": ["item:1"], "tags": ["user:1"]}')
+    for _ in range(100):
+        if cache._local.get("item:2") is None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert not listener.done()
+    listener.cancel()
+    assert cache._local.get("item:1") is None and cache._local.get("item:2") is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_is_one_round_trip(monkeypatch, redis):
+    await redis.mset({"item:1": "a", "item:2": "b", "item:3": "c"})
+    await redis.set(f"{TAG_PREFIX}user:1", 4)
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(settings.CACHE_INVALIDATION_CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    round_trips = []
+    execute_command, pipeline = redis.execute_command, redis.pipeline
+
+    async def counted_command(*args, **kwargs):
+        round_trips.append(args[0])
+        return await execute_command(*args, **kwargs)
+
+    def counted_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counted_execute(*execute_args, **execute_kwargs):
+            round_trips.append("pipeline")
+            return await execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    monkeypatch.setattr(redis, "execute_command", counted_command)
+    monkeypatch.setattr(redis, "pipeline", counted_pipeline)
+
+    assert await cache.invalidate(["item:1", "item:2", "missing"], tags=["user:1", "user:2"]) == 2
+    assert round_trips == ["pipeline"]
+
+    assert await redis.exists("item:1", "item:2") == 0 and await redis.exists("item:3") == 1
+    assert await redis.mget(f"{TAG_PREFIX}user:1", f"{TAG_PREFIX}user:2") == [b"5", b"1"]
+    message = await pubsub.get_message(timeout=1)
+    assert json.loads(message["data"]) == {"keys": ["item:1", "item:2", "missing"], "patterns": [], "tags": ["user:1", "user:2"]}
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_atomic_invalidation_removes_pattern_matches_in_a_script(redis):
+    await redis.mset({"item:1": "a", "user:1:items:1": "b", "user:1:items:2": "c", "user:2:items:1": "d"})
+
+    assert await cache.invalidate(["item:1"], ["user:1:items:*"], atomic=True) == 3
+    assert sorted(await redis.keys("*")) == [b"user:2:items:1"]
+
+
+@pytest.mark.asyncio
+async def test_tag_counters_expire_but_outlive_their_entries(redis):
+    calls: list[int] = []
+    read_item = endpoint(calls, stale_ttl=settings.CACHE_TAG_TTL_SECONDS, tags=["item:{item_id}"])
+    tag_key = f"{TAG_PREFIX}item:1"
+
+    await cache.invalidate([], tags=["item:1"])
+    assert 0 < await redis.ttl(tag_key) <= settings.CACHE_TAG_TTL_SECONDS
+
+    # an entry outliving the counter's TTL extends it; a later bump never shortens it
+    await read_item(request(), item_id=1)
+    lifetime = 60 + settings.CACHE_TAG_TTL_SECONDS
+    assert await redis.ttl(tag_key) >= lifetime - 1
+    await cache.invalidate([], tags=["item:1"])
+    assert await redis.get(tag_key) == b"2" and await redis.ttl(tag_key) >= lifetime - 1
@@ -0,0 +1,26 @@
+import pytest
+
+from app.core.utils.cache_codec import CacheCodec, msgpack
+
+VALUE = [{"id": i, "name": "employee"} for i in range(100)]
+
+
+def test_default_codec_writes_plain_json():
+    data = CacheCodec().dumps(VALUE)
+    assert data.startswith(b"[")
+    assert CacheCodec(compression="zlib").loads(data) == VALUE
+
+
+def test_compressed_values_are_readable_by_any_codec():
+    writer = CacheCodec(compression="zlib", threshold=256)
+    data = writer.dumps(VALUE)
+
+    assert data[0] < 0x20 and len(data) < len(CacheCodec().dumps(VALUE))
+    assert CacheCodec().loads(data) == VALUE
+    assert writer.dumps({"small": True}) == b'{"small":true}'
+
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+def test_msgpack_values_decode_to_json():
+    data = CacheCodec(serializer="msgpack").dumps(VALUE)
+    assert CacheCodec().decode(data) == CacheCodec().dumps(VALUE)
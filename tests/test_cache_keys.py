@@ -0,0 +1,93 @@
+import re
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from app.core.exceptions.cache_exceptions import CacheIdentificationInferenceError
+from app.core.utils.cache import _compile_resource_id, _compile_template, _template_fields
+
+
+def _legacy_format(template: str, kwargs: dict[str, Any]) -> str:
+    """Key template formatting as the decorator did it before templates were compiled."""
+    fields = re.findall(r"{(.*?)}", template)
+    return template.format(**{field: kwargs[field] for field in fields})
+
+
+def _legacy_resource_id(kwargs: dict[str, Any], resource_id_name: Any, resource_id_type: Any) -> int | str:
+    if resource_id_name:
+        return kwargs[resource_id_name]
+
+    resource_id = None
+    for name, value in kwargs.items():
+        if isinstance(value, resource_id_type):
+            if resource_id_type is int and "id" in name:
+                resource_id = value
+            elif resource_id_type is str:
+                resource_id = value
+    if resource_id is None:
+        raise CacheIdentificationInferenceError
+    return resource_id
+
+
+def _outcome(build: Callable[[], str]) -> str | type[Exception]:
+    """The key, or the type of the error building it raised."""
+    try:
+        return build()
+    except Exception as e:
+        return type(e)
+
+
+async def read_post(request, user_id: int, org_id: int, page: int, slug: str, post_id: int = 0): ...
+
+
+# What the decorator's wrapper receives as kwargs: FastAPI passes every parameter by keyword, in
+# signature order; direct calls may pass some positionally (those never reach kwargs) or leave
+# defaults out.
+CALLS = [
+    {"user_id": 42, "org_id": 7, "page": 3, "slug": "hello", "post_id": 1234},
+    {"user_id": 42, "org_id": 7, "page": 3, "slug": "hello"},
+    {"org_id": 7, "page": 3, "slug": "hello"},
+    {"user_id": 42, "page": 3, "slug": "hello", "post_id": 0},
+]
+
+
+@pytest.mark.parametrize("kwargs", CALLS)
+@pytest.mark.parametrize(
+    "resource_id_name, resource_id_type",
+    [(None, int), (None, str), ("page", int), ("slug", int)],
+)
+@pytest.mark.parametrize("key_prefix", ["posts", "org:{org_id}:posts", "org:{org_id}:page:{page}"])
+def test_compiled_keys_match_the_legacy_format(kwargs, resource_id_name, resource_id_type, key_prefix):
+    format_prefix = _compile_template(key_prefix)
+    resolve_resource_id = _compile_resource_id(read_post, resource_id_name, resource_id_type)
+
+    compiled = _outcome(lambda: f"{format_prefix(kwargs)}:{resolve_resource_id(kwargs)}")
+    legacy = _outcome(
+        lambda: f"{_legacy_format(key_prefix, kwargs)}:"
+        f"{_legacy_resource_id(kwargs, resource_id_name, resource_id_type)}"
+    )
+    assert compiled == legacy
+
+
+def test_compiled_invalidation_keys_match_the_legacy_format():
+    kwargs = CALLS[0]
+    extra = {"user:{user_id}": "{user_id}", "org:{org_id}:feed": "{org_id}", "global": "{page}"}
+    for prefix, id_template in extra.items():
+        compiled = f"{_compile_template(prefix)(kwargs)}:{kwargs[_template_fields(id_template)[0]]}"
+        legacy = f"{_legacy_format(prefix, kwargs)}:{kwargs[re.findall(r'{(.*?)}', id_template)[0]]}"
+        assert compiled == legacy
+
+    for template in ["user:{user_id}", "org:{org_id}:user:{user_id}", "posts"]:
+        assert _compile_template(template)(kwargs) == _legacy_format(template, kwargs)
+
+
+@pytest.mark.parametrize("resource_id_type", [int, (int, str)])
+def test_unresolvable_resource_id_fails_like_the_legacy_lookup(resource_id_type):
+    kwargs = {"page": 3, "slug": "hello"}
+    resolve_resource_id = _compile_resource_id(read_post, None, resource_id_type)
+
+    with pytest.raises(CacheIdentificationInferenceError):
+        _legacy_resource_id(kwargs, None, resource_id_type)
+    with pytest.raises(CacheIdentificationInferenceError):
+        resolve_resource_id(kwargs)
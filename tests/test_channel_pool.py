@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.messaging import channel_pool
+from app.messaging.publisher import OutgoingEvent
+from app.messaging.rabbitmq import RabbitMQClient
+
+
+class BasicAck:
+    """What aio_pika returns for a publish the broker confirmed."""
+
+
+class FakeExchange:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def publish(self, message, routing_key):
+        await asyncio.sleep(0)
+        self.channel.published.append(routing_key)
+        return BasicAck()
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.is_closed = False
+        self.published: list[str] = []
+
+    async def declare_exchange(self, *args, **kwargs):
+        return FakeExchange(self)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.is_closed = False
+        self.connected = asyncio.Event()
+        self.connected.set()
+        self.channels: list[FakeChannel] = []
+
+    async def channel(self, publisher_confirms=True):
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        self.is_closed = True
+
+
+async def connect_fake(monkeypatch) -> list[FakeConnection]:
+    connections: list[FakeConnection] = []
+
+    async def connect_robust(url):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(channel_pool.aio_pika, "connect_robust", connect_robust)
+    return connections
+
+
+@pytest.mark.asyncio
+async def test_confirmed_events_are_published_once(monkeypatch):
+    await connect_fake(monkeypatch)
+    client = RabbitMQClient("amqp://test", pool_size=2, max_attempts=2)
+    for i in range(3):
+        await client.publish_event(f"key{i}", {"i": i})
+
+    assert await client.publisher.flush() == 0.0
+    assert client.publisher.stats["published"] == 3 and client.publisher.stats["retried"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_shards_channels_and_reopens_closed_ones(monkeypatch):
+    connections = await connect_fake(monkeypatch)
+    client = RabbitMQClient("amqp://test", pool_size=4, connections=2)
+
+    events = [OutgoingEvent(f"key{i}", b"{}") for i in range(10)]
+    assert await client.publish_batch(events) == [None] * 10
+
+    assert len(connections) == 2 and [len(c.channels) for c in connections] == [2, 2]
+    channels = [channel for connection in connections for channel in connection.channels]
+    assert sorted(len(channel.published) for channel in channels) == [1, 3, 3, 3]
+
+    channels[0].is_closed = True
+    for _ in range(4):
+        assert await client.publish_batch([OutgoingEvent("user.deactivated", b"{}")]) == [None]
+    assert len(connections[0].channels) == 3 and not connections[0].channels[-1].is_closed
+    assert client.channels.stats()["idle"] == 4
+
+    # a channel checked out across close() is not returned to the pool
+    async with client.channels.acquire():
+        await client.channels.close()
+    await client.connect()
+    assert client.channels.stats()["idle"] == 4
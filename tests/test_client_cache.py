@@ -0,0 +1,49 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.client_cache_middleware import CachePolicy, ClientCacheMiddleware, cache_policy
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ClientCacheMiddleware, max_age=30)
+
+    @app.get("/items")
+    async def items():
+        return {"items": [1, 2, 3]}
+
+    @app.get("/profile")
+    @cache_policy(CachePolicy(max_age=5, private=True))
+    async def profile():
+        return {"name": "ada"}
+
+    @app.post("/items")
+    async def create_item():
+        return {"id": 4}
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a", b"b"]))
+
+    return TestClient(app)
+
+
+def test_cache_headers_etag_and_not_modified():
+    client = _client()
+
+    response = client.get("/items")
+    assert response.headers["cache-control"] == "public, max-age=30"
+    etag = response.headers["etag"]
+
+    not_modified = client.get("/items", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    authenticated = client.get("/items", headers={"Authorization": "Bearer x"})
+    assert authenticated.headers["cache-control"] == "private, max-age=30"
+    assert client.get("/profile").headers["cache-control"] == "private, max-age=5"
+    assert client.post("/items").headers["cache-control"] == "no-store"
+
+    streamed = client.get("/stream")
+    assert streamed.content == b"ab" and "etag" not in streamed.headers
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import db
+from app.core.utils.db_pool import InstrumentedAsyncPool
+
+
+@pytest.mark.asyncio
+async def test_pool_records_waits_overflow_and_timeouts():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+
+    async def hold():
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+            await asyncio.sleep(0.2)
+
+    results = await asyncio.gather(*(hold() for _ in range(3)), return_exceptions=True)
+    stats = engine.pool.stats()
+    await engine.dispose()
+
+    assert sum(isinstance(result, Exception) for result in results) == 1
+    assert stats["timeouts"] == 1 and stats["overflow_opened"] == 1
+    assert stats["peak_checked_out"] == 2 and stats["checked_out"] == 0
+    assert sum(stats["wait_seconds"]["buckets"].values()) == 3
+
+
+def test_read_session_shares_the_primary_session_without_replica():
+    assert db.replica_engine is None
+    app = FastAPI()
+
+    @app.get("/")
+    async def endpoint(write: db.SessionDep, read: db.ReadSessionDep):
+        return {"shared": write is read}
+
+    assert TestClient(app).get("/").json() == {"shared": True}
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.messaging.event_consumer import EmployeeEventConsumer
+from app.models.auth import User
+from tests.conftest import AsyncSessionLocal
+
+
+class FakeMessage:
+    def __init__(self, event: dict):
+        self.body = json.dumps(event).encode()
+        self.redelivered = False
+        self.acked = False
+        self.requeued = False
+
+    async def ack(self):
+        self.acked = True
+
+    async def nack(self, requeue: bool = True):
+        self.requeued = requeue
+
+
+@pytest.mark.asyncio
+async def test_consumer_applies_a_batch_with_bulk_updates_and_acks_after_commit():
+    users = [User(username=f"employee{i}", email=f"employee{i}@old.test", password_hash="x") for i in range(3)]
+    async with AsyncSessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+
+    consumer = EmployeeEventConsumer("amqp://test", concurrency=1, session_factory=AsyncSessionLocal)
+    events = [
+        {"event_type": "employee.terminated", "user_id": users[0].id},
+        {"event_type": "employee.updated", "user_id": users[1].id, "email": "a@new.test", "updated_fields": {"email": "a@new.test"}},
+        {"event_type": "employee.updated", "user_id": users[1].id, "email": "b@new.test", "updated_fields": {"email": "b@new.test"}},
+        {"event_type": "employee.hired", "user_id": users[2].id},
+    ]
+    messages = [FakeMessage(event) for event in events]
+    for message in messages:
+        await consumer.enqueue(message)
+
+    queue = consumer._queues[0]
+    await consumer.process_batch([queue.get_nowait() for _ in range(queue.qsize())])
+    assert all(message.acked for message in messages)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.id.in_([user.id for user in users])).order_by(User.username))
+        stored = result.scalars().all()
+    assert [user.is_active for user in stored] == [False, True, True]
+    assert [user.email for user in stored] == ["employee0@old.test", "b@new.test", "employee2@old.test"]
+
+
+@pytest.mark.asyncio
+async def test_consumer_isolates_the_event_that_fails_a_batch():
+    users = [User(username=f"isolated{i}", email=f"isolated{i}@old.test", password_hash="x") for i in range(2)]
+    async with AsyncSessionLocal() as db:
+        db.add_all(users)
+        await db.commit()
+
+    consumer = EmployeeEventConsumer("amqp://test", concurrency=1, session_factory=AsyncSessionLocal)
+    taken = users[1].email
+    messages = [
+        FakeMessage({"event_type": "employee.terminated", "user_id": users[0].id}),
+        # violates the unique email constraint
+        FakeMessage({"event_type": "employee.updated", "user_id": users[0].id, "email": taken, "updated_fields": {"email": taken}}),
+        FakeMessage({"event_type": "employee.terminated", "user_id": users[1].id}),
+    ]
+    await consumer.process_batch([(message, json.loads(message.body)) for message in messages])
+
+    assert [message.acked for message in messages] == [True, False, True]
+    assert messages[1].requeued
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.is_active).where(User.id.in_([user.id for user in users])))
+        assert result.scalars().all() == [False, False]
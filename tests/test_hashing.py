@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions.http_exceptions import ServiceUnavailableException
+from app.core.utils.hashing import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_on_pool():
+    hasher = PasswordHasher(max_workers=2, max_pending=4)
+    try:
+        hashed = await hasher.hash("Str1ngst!")
+        assert await hasher.verify("Str1ngst!", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert hasher.metrics.completed == 3
+        assert hasher.metrics.in_flight == 0
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_fast():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    try:
+        first = asyncio.create_task(hasher.hash("Str1ngst!"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServiceUnavailableException):
+            await hasher.hash("Str1ngst!")
+
+        await first
+        assert hasher.metrics.rejected == 1
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,95 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+from app.core.utils import jwt_keys
+from shared.auth.jwt_utils import JWTManager
+from shared.auth.keys import JWKSCache, KeySet
+from shared.auth.verifier import TokenVerifier
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def _public_pem(private_key) -> str:
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+
+
+def test_verifier_uses_published_jwks_across_rotation():
+    retired = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    current = ed25519.Ed25519PrivateKey.generate()
+
+    old_issuer = KeySet.from_pem(_pem(retired))
+    issuer = KeySet.from_pem(_pem(current), previous_public_pems=[_public_pem(retired)])
+    assert issuer.algorithm == "EdDSA" and old_issuer.algorithm == "RS256"
+
+    verifier = JWKSCache("https://auth.invalid/.well-known/jwks.json")
+    verifier.load(issuer.jwks())
+    assert len(verifier) == 2
+
+    manager = JWTManager(keys=verifier)
+    for keys in (issuer, old_issuer):
+        token = JWTManager(keys=keys).create_token("42", "ada", False, ["employee:read"])
+        assert manager.verify_token(token).permissions == ["employee:read"]
+
+    stranger = KeySet.from_pem(_pem(ed25519.Ed25519PrivateKey.generate()))
+    assert manager.verify_token(JWTManager(keys=stranger).create_token("1", "eve", True, [])) is None
+
+
+def test_shared_secret_keys_publish_nothing():
+    keys = KeySet.from_secret("secret")
+    assert keys.jwks() == {"keys": []}
+    verifier = TokenVerifier(keys)
+    assert verifier.verify(keys.sign({"sub": "42"})).sub == "42"
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(KeySet.from_secret("other").sign({"sub": "42"}))
+
+
+def test_verifier_rejects_expired_malformed_and_mismatched_tokens():
+    keys = KeySet.from_secret("secret")
+    verifier = TokenVerifier(keys)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(keys.sign({"sub": "42", "exp": 1}))
+    with pytest.raises(jwt.DecodeError):
+        verifier.decode("not-a-token")
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.decode(jwt.encode({"sub": "42"}, "secret", algorithm="HS512"))
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        verifier.decode(keys.sign({"username": "ada"}))
+
+
+def test_previous_key_keeps_its_configured_kid():
+    retired = ed25519.Ed25519PrivateKey.generate()
+    old_token = KeySet.from_pem(_pem(retired), kid="2025-signing").sign({"sub": "42"})
+
+    keys = KeySet.from_pem(
+        _pem(ed25519.Ed25519PrivateKey.generate()),
+        kid="2026-signing",
+        previous_public_pems=[_public_pem(retired)],
+        previous_kids=["2025-signing"],
+    )
+    assert TokenVerifier(keys).verify(old_token).sub == "42"
+    kids = [jwk["kid"] for jwk in keys.jwks()["keys"]]
+    assert kids[0] == "2025-signing" and "2026-signing" in kids and len(kids) == 3
+
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_publishes_the_current_keys(client, monkeypatch):
+    keys = KeySet.from_pem(_pem(ed25519.Ed25519PrivateKey.generate()), kid="current")
+    monkeypatch.setattr(jwt_keys, "keys", keys)
+
+    response = await client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.json() == keys.jwks() and response.json()["keys"][0]["kid"] == "current"
+    assert "max-age" in response.headers["cache-control"]
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import delete, select
+
+from app.messaging.outbox import OutboxService, relay_batch
+from app.models.outbox import OutboxEvent
+
+
+@pytest.mark.asyncio
+async def test_outbox_events_commit_with_the_change_and_relay_marks_them_sent(db_session):
+    await db_session.execute(delete(OutboxEvent))
+    OutboxService.add(db_session, "user.role.assigned", user_id="u1", role_id="r1")
+    OutboxService.add(db_session, "user.role.removed", user_id="u1", role_id="r2")
+    await db_session.commit()
+
+    batches = []
+
+    async def send(events):
+        batches.append([event.routing_key for event in events])
+        return [None, ConnectionError("nack")][: len(events)]
+
+    assert await relay_batch(db_session, send, batch_size=10) == 1
+    assert await relay_batch(db_session, send, batch_size=10) == 1
+    assert await relay_batch(db_session, send, batch_size=10) == 0
+    assert batches == [["user.role.assigned", "user.role.removed"], ["user.role.removed"]]
+
+    events = (await db_session.execute(select(OutboxEvent).order_by(OutboxEvent.id))).scalars().all()
+    assert all(event.sent_at is not None for event in events)
+    assert [event.attempts for event in events] == [0, 1]
+    assert events[0].payload["event_id"] == events[0].event_id
+
+
+@pytest.mark.asyncio
+async def test_outbox_parks_events_after_max_attempts(db_session):
+    await db_session.execute(delete(OutboxEvent))
+    OutboxService.add(db_session, "user.role.assigned", user_id="u1", role_id="r1")
+    await db_session.commit()
+
+    async def send(events):
+        return [ConnectionError("nack")] * len(events)
+
+    for _ in range(3):
+        assert await relay_batch(db_session, send, batch_size=10, max_attempts=2) == 0
+
+    event = (await db_session.execute(select(OutboxEvent))).scalar_one()
+    assert event.attempts == 2 and event.sent_at is None
+
+
+@pytest.mark.asyncio
+async def test_outbox_applies_committed_events_locally(db_session):
+    await db_session.execute(delete(OutboxEvent))
+    OutboxService.add(db_session, "user.role.assigned", user_id="u1", role_id="r1")
+    await db_session.commit()
+
+    applied = []
+
+    async def send(events):
+        return [None] * len(events)
+
+    async def apply(db, payloads):
+        applied.extend(payload["event_type"] for payload in payloads)
+        raise RuntimeError("cache down")
+
+    # a failing side effect is logged and does not keep the event from being marked sent
+    assert await relay_batch(db_session, send, batch_size=10, apply=apply) == 1
+    assert await relay_batch(db_session, send, batch_size=10, apply=apply) == 0
+    assert applied == ["user.role.assigned"]
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from app.core.utils import cache
+from app.models.auth import Permission
+from app.services import permission_registry
+from app.services.permission_registry import REDIS_KEY, PermissionRegistryService
+from shared.auth.permissions import PermissionRegistry
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.mark.asyncio
+async def test_cold_registry_is_read_only(monkeypatch, db_session):
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(cache, "client", redis)
+    monkeypatch.setattr(permission_registry, "registry", PermissionRegistry({}))
+
+    permission = Permission(resource="registry-test", action="read", description=None)
+    db_session.add(permission)
+    await db_session.flush()
+
+    # unknown: callers fall back to the resolver, and no bit is assigned from the request
+    assert await PermissionRegistryService.get() is None
+    assert permission.bit_index is None and not db_session.new and not db_session.dirty
+
+    snapshot = PermissionRegistry({"registry-test:read": 0}, {"role": 1})
+    await redis.set(REDIS_KEY, json.dumps(snapshot.to_dict()))
+    loaded = await PermissionRegistryService.get()
+    assert loaded.version == snapshot.version and loaded.role_mask(["role"]) == 1
+    assert await PermissionRegistryService.get() is loaded
@@ -0,0 +1,75 @@
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.utils import cache
+from app.models.auth import Role, User, UserRole
+from app.services import permission_resolver
+from app.services.permission_resolver import PermissionResolver
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def database_permissions(monkeypatch):
+    """Permissions the resolver reads from the database, and a log of those reads."""
+    grants: dict[str, list[str]] = {}
+    reads: list[str] = []
+
+    async def get_user_permissions(db, user_id):
+        reads.append(user_id)
+        return grants.get(user_id, [])
+
+    monkeypatch.setattr(permission_resolver.AuthService, "get_user_permissions", get_user_permissions)
+    return grants, reads
+
+
+@pytest.mark.asyncio
+async def test_generation_bump_invalidates_users_and_role_members(monkeypatch, db_session, database_permissions):
+    grants, reads = database_permissions
+    monkeypatch.setattr(cache, "client", fakeredis.FakeAsyncRedis())
+
+    role = Role(name="resolver-test-role", description=None)
+    user = User(username="resolver-test", email="resolver-test@example.com", password_hash="x")
+    db_session.add_all([role, user])
+    await db_session.flush()
+    db_session.add(UserRole(user_id=user.id, role_id=role.id))
+    await db_session.flush()
+
+    grants[user.id] = ["employee:read"]
+    assert await PermissionResolver.get_user_permissions(db_session, user.id) == {"employee:read"}
+
+    # another process: empty L1, served from Redis
+    permission_resolver._local.pop(user.id)
+    assert await PermissionResolver.get_user_permissions(db_session, user.id) == {"employee:read"}
+    assert reads == [user.id]
+
+    grants[user.id] = ["employee:read", "employee:write"]
+    await PermissionResolver.invalidate_user(user.id)
+    assert await PermissionResolver.get_user_permissions(db_session, user.id) == {"employee:read", "employee:write"}
+
+    grants[user.id] = []
+    await PermissionResolver.invalidate_role(db_session, role.id)
+    assert await PermissionResolver.get_user_permissions(db_session, user.id) == frozenset()
+    assert reads == [user.id] * 3
+
+
+class BrokenRedis:
+    async def eval(self, *args):
+        raise RedisConnectionError("connection refused")
+
+    async def set(self, *args, **kwargs):
+        raise AssertionError("no write-back without a generation")
+
+    def pipeline(self, transaction=True):
+        raise RedisConnectionError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_redis_outage_falls_back_to_the_database(monkeypatch, database_permissions):
+    grants, reads = database_permissions
+    monkeypatch.setattr(cache, "client", BrokenRedis())
+    grants["outage-user"] = ["payroll:read"]
+
+    assert await PermissionResolver.get_user_permissions(None, "outage-user") == {"payroll:read"}
+    await PermissionResolver.invalidate_user("outage-user")
+    assert reads == ["outage-user"]
@@ -0,0 +1,48 @@
+import jwt
+
+from shared.auth.claims import FORMAT_CLAIM, expand_claims
+from shared.auth.jwt_utils import JWTManager
+from shared.auth.permissions import PermissionRegistry, PermissionSet, compile_permissions
+
+
+def test_permission_set_wildcards():
+    grants = PermissionSet(["employee:*", "*:read", "payroll:approve"])
+
+    assert grants.allows("employee:delete")
+    assert grants.allows("department:read")
+    assert grants.allows("payroll:approve")
+    assert not grants.allows("payroll:write")
+    assert PermissionSet(["*:*"]).allows("anything:at-all")
+    assert not PermissionSet([]).allows("employee:read")
+
+
+def test_identical_grants_compile_once():
+    assert compile_permissions(["a:b", "c:d"]) is compile_permissions(("c:d", "a:b"))
+
+
+def test_registry_masks_round_trip():
+    registry = PermissionRegistry(
+        {"employee:read": 0, "employee:write": 1, "payroll:read": 2, "role:read": 70}
+    )
+
+    mask = registry.mask(["employee:*", "role:read"])
+    decoded = registry.decode_mask(registry.encode_mask(mask))
+
+    assert decoded == mask
+    assert registry.allows(decoded, "employee:write")
+    assert registry.allows(decoded, "role:read")
+    assert not registry.allows(decoded, "payroll:read")
+    assert not registry.allows(decoded, "unknown:read")
+    assert sorted(registry.names(decoded)) == ["employee:read", "employee:write", "role:read"]
+
+
+def test_compact_token_round_trip():
+    compact = JWTManager("secret", token_format=2)
+    token = compact.create_token("42", "ada", False, ["employee:read"])
+
+    payload = jwt.decode(token, "secret", algorithms=["HS256"])
+    assert payload[FORMAT_CLAIM] == 2 and "su" not in payload and payload["p"] == ["employee:read"]
+    assert expand_claims(payload)["is_superuser"] is False
+
+    verified = JWTManager("secret").verify_token(token)
+    assert verified.username == "ada" and verified.permissions == ["employee:read"]
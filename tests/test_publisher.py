@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.messaging.publisher import BufferedPublisher, OutgoingEvent
+
+
+@pytest.mark.asyncio
+async def test_publisher_batches_retries_in_order_and_gives_up():
+    sent: list[list[str]] = []
+    failures = {"b": 1, "c": 10}
+
+    async def send(batch: list[OutgoingEvent]) -> list[BaseException | None]:
+        sent.append([event.routing_key for event in batch])
+        results: list[BaseException | None] = []
+        for event in batch:
+            failing = failures.get(event.routing_key, 0) > 0
+            failures[event.routing_key] = failures.get(event.routing_key, 0) - 1
+            results.append(ConnectionError("nack") if failing else None)
+        return results
+
+    publisher = BufferedPublisher(send, max_buffer=3, batch_size=2, max_attempts=2, retry_backoff=0.1)
+    for key in ("a", "b", "c", "d"):
+        await publisher.publish(key, {"event_type": key})
+
+    # "d" did not fit and there is no Redis to spill it to
+    assert len(publisher) == 3 and publisher.stats["dropped"] == 1
+
+    assert await publisher.flush() == 0.1
+    assert [event.routing_key for event in publisher._buffer] == ["b", "c"]
+    assert await publisher.flush() == 0.2
+    # "c" fails its last attempt and is handed to the spill
+    assert await publisher.flush() == 0.4 and len(publisher) == 0
+
+    assert sent == [["a", "b"], ["b", "c"], ["c"]]
+    assert publisher.stats["published"] == 2 and publisher.stats["dropped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_in_flight_at_shutdown_is_kept():
+    started = asyncio.Event()
+
+    async def send(batch: list[OutgoingEvent]) -> list[BaseException | None]:
+        started.set()
+        await asyncio.Event().wait()
+
+    publisher = BufferedPublisher(send)
+    for key in ("a", "b"):
+        await publisher.publish(key, {"event_type": key})
+
+    task = asyncio.create_task(publisher.run())
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert [event.routing_key for event in publisher._buffer] == ["a", "b"]
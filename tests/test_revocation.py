@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.utils import cache
+from app.core.utils.revocation import CHANNEL, RevocationStore
+
+
+class FlakyPubSub:
+    def __init__(self, client):
+        self.client = client
+
+    async def subscribe(self, channel):
+        self.client.subscriptions += 1
+        if self.client.subscriptions == 1:
+            raise RedisConnectionError("connection reset")
+
+    async def listen(self):
+        yield {"type": "message", "channel": CHANNEL, "data": b"revoked-jti"}
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        pass
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.subscriptions = 0
+
+    def pubsub(self):
+        return FlakyPubSub(self)
+
+    async def exists(self, key):
+        raise RedisConnectionError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_and_lookups_fall_back_when_redis_fails(monkeypatch):
+    monkeypatch.setattr(cache, "client", FlakyRedis())
+    store = RevocationStore(capacity=100, error_rate=0.01)
+    store.ready = True
+
+    listener = asyncio.create_task(store.listen(max_backoff=0))
+    for _ in range(100):
+        await asyncio.sleep(0)
+        if "revoked-jti" in store.bloom:
+            break
+    listener.cancel()
+
+    assert cache.client.subscriptions == 2 and "revoked-jti" in store.bloom
+    # revocations may have been missed while disconnected: not trusted until the next reload
+    assert store.ready is False
+    assert await store.is_revoked("other-jti") is None
+
+
+class ReadOnlyRedis(FlakyRedis):
+    def pipeline(self, transaction=True):
+        raise RedisConnectionError("read only replica")
+
+    async def exists(self, key):
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_revocation_whose_redis_write_failed_is_checked_against_the_database(monkeypatch):
+    monkeypatch.setattr(cache, "client", ReadOnlyRedis())
+    store = RevocationStore(capacity=100, error_rate=0.01)
+    store.ready = True
+
+    await store.revoke("revoked-jti", time.time() + 60)
+
+    # Redis never got the key: defer to the blacklist table rather than report it live
+    assert await store.is_revoked("revoked-jti") is None
+    assert await store.is_revoked("other-jti") is False
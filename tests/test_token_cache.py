@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.utils import cache
+from app.core.utils.token_cache import CurrentUser, VerifiedTokenCache
+from app.core.utils.ttl_cache import TTLCache
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover
+    fakeredis = None
+
+
+def _user(user_id: str) -> CurrentUser:
+    return CurrentUser(
+        id=user_id,
+        username=f"user{user_id}",
+        email=f"user{user_id}@example.com",
+        is_active=True,
+        is_superuser=False,
+    )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_verified_token_cache_honours_exp_and_invalidation():
+    cache = VerifiedTokenCache(maxsize=10, ttl=60)
+    cache.set("expired", {"exp": time.time() - 1}, _user("1"))
+    cache.set("live", {"exp": time.time() + 600}, _user("1"))
+    cache.set("other", {"exp": time.time() + 600}, _user("2"))
+
+    assert cache.get("expired") is None
+    assert cache.get("live").user.id == "1"
+
+    assert cache.invalidate_user("1") == 1
+    assert cache.get("live") is None
+    assert cache.get("other") is not None
+
+
+@pytest.mark.skipif(fakeredis is None, reason="fakeredis not installed")
+@pytest.mark.asyncio
+async def test_evictions_reach_every_process(monkeypatch):
+    redis = fakeredis.FakeAsyncRedis()
+    here, there = VerifiedTokenCache(maxsize=10, ttl=60), VerifiedTokenCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(cache, "client", redis)
+    # two processes, each with its own cache behind the shared channel
+    monkeypatch.setattr(cache, "invalidation_handlers", [there.apply_invalidation])
+    for tokens in (here, there):
+        tokens.set("user-1", {}, _user("1"))
+        tokens.set("logged-out", {}, _user("2"))
+        tokens.set("user-2", {}, _user("2"))
+
+    listener = asyncio.create_task(cache.listen_for_invalidations())
+    while (await redis.pubsub_numsub(settings.CACHE_INVALIDATION_CHANNEL))[0][1] == 0:
+        await asyncio.sleep(0.01)
+
+    await here.evict(user_ids=["1"])
+    await here.evict(tokens=["logged-out"])
+    for _ in range(100):
+        if there.get("logged-out") is None:
+            break
+        await asyncio.sleep(0.01)
+    listener.cancel()
+
+    for tokens in (here, there):
+        assert tokens.get("user-1") is None and tokens.get("logged-out") is None
+        assert tokens.get("user-2") is not None